@@ -0,0 +1,36 @@
+"""
+API settings.
+
+The service does not read ``config/base/api.yml``: the defaults below copy its
+values, and the only way to change a setting is an ``API_``-prefixed
+environment variable (e.g. ``API_RATE_LIMIT_BACKEND=shared``).
+"""
+from functools import lru_cache
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime settings for the API service."""
+
+    model_config = SettingsConfigDict(env_prefix="API_")
+
+    # Rate limiting (api.rate_limiting): requests per minute per client IP
+    rate_limit_enabled: bool = True
+    rate_limit_requests_per_minute: int = 100
+    rate_limit_burst_size: int = 20
+    # "memory": per worker; "shared": one limit across all workers on the host
+    rate_limit_backend: Literal["memory", "shared"] = "memory"
+    rate_limit_shared_path: Optional[str] = None
+    rate_limit_max_clients: int = 100_000
+
+    # Token leaderboard snapshot published by the daily DAGs
+    token_snapshot_dir: str = "/snapshots/token_leaderboard"
+    token_snapshot_check_seconds: float = 5.0
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings."""
+    return Settings()
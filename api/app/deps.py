@@ -0,0 +1,14 @@
+"""
+Shared FastAPI dependencies.
+"""
+from functools import lru_cache
+
+from app.config import get_settings
+from app.services.token_snapshot import SnapshotStore
+
+
+@lru_cache
+def get_snapshot_store() -> SnapshotStore:
+    """Return the process-wide token snapshot store."""
+    settings = get_settings()
+    return SnapshotStore(settings.token_snapshot_dir, settings.token_snapshot_check_seconds)
@@ -2,9 +2,14 @@
 Oracul Platform - FastAPI Application
 Main entry point for the REST API serving blockchain analytics data.
 """
+from app.config import get_settings
+from app.rate_limit import RateLimitMiddleware, create_backend
+from app.routes import tokens
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+settings = get_settings()
+
 app = FastAPI(
     title="Oracul Blockchain Analytics API",
     description="REST API for blockchain data analytics and anomaly detection",
@@ -13,6 +18,10 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware, backend=create_backend(settings))
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +31,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(tokens.router)
+
 
 @app.get("/")
 async def root():
@@ -0,0 +1,62 @@
+"""
+Response models for token metrics endpoints.
+"""
+from datetime import date
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+RankBy = Literal["volume", "tx_count", "unique_addresses", "anomaly_score"]
+
+
+class TokenMetrics(BaseModel):
+    """Latest daily metrics of a token; None where the snapshot has no value."""
+
+    volume: Optional[float] = None
+    tx_count: Optional[int] = None
+    unique_addresses: Optional[int] = None
+    price_change: Optional[float] = None
+    anomaly_score: Optional[float] = None
+    volume_usd: Optional[float] = None
+
+
+class Sparkline(BaseModel):
+    """Daily values of one metric, oldest first."""
+
+    metric: str
+    start: date
+    values: List[float]
+
+
+class RankedToken(BaseModel):
+    """Leaderboard entry."""
+
+    rank: int
+    address: str
+    symbol: Optional[str] = None
+    name: Optional[str] = None
+    metrics: TokenMetrics
+    sparkline: Optional[List[float]] = None
+
+
+class TopTokensResponse(BaseModel):
+    """Tokens ranked by one metric."""
+
+    as_of: date
+    generated_at: str
+    by: RankBy
+    sparkline_start: date
+    tokens: List[RankedToken]
+
+
+class TokenSummary(BaseModel):
+    """Latest metrics, ranks and sparkline of one token."""
+
+    as_of: date
+    generated_at: str
+    address: str
+    symbol: Optional[str] = None
+    name: Optional[str] = None
+    metrics: TokenMetrics
+    ranks: Dict[str, Optional[int]]
+    sparkline: Sparkline
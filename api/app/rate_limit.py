@@ -0,0 +1,290 @@
+"""
+Token bucket rate limiting middleware.
+
+Each client key (the remote IP by default) owns a bucket of up to
+``burst_size`` tokens that refills continuously at ``requests_per_minute``.
+A request takes one token; with an empty bucket the request is answered with
+429 and a ``Retry-After`` header. A bucket is just ``(tokens, updated_at)``,
+refilled lazily when its client is next seen, so every check is O(1) and no
+timers run in the background.
+
+A bucket left idle until it is full again is identical to a new one, so both
+backends only ever evict refilled buckets. When the table is full and no
+candidate has refilled, a new client is refused (fail closed) until one has:
+forgetting a client never hands it a fresh burst. Size the table above the
+number of clients active within one refill window (``burst_size`` tokens at
+``requests_per_minute``).
+
+Backends:
+
+- :class:`MemoryBackend` keeps buckets in a per-process dict in LRU order,
+  capped at ``max_keys`` (the least recently seen client is evicted first).
+- :class:`SharedMemoryBackend` keeps them in a fixed-size hash table in a
+  memory-mapped file guarded by ``flock``, so all Uvicorn workers on a host
+  enforce one combined limit.
+"""
+import fcntl
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import blake2b
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Protocol, Tuple, Union
+
+from app.config import Settings
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+SHARED_FILE_NAME = "oracul_api_rate_limit.bin"
+
+# Shared slot: key hash (0 = empty), tokens, updated_at
+_SLOT = struct.Struct("<Qdd")
+# Slots examined per lookup for the key, an empty slot or a refilled bucket
+_MAX_PROBES = 8
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Sustained rate and burst allowance for one client."""
+
+    requests_per_minute: int = 100
+    burst_size: int = 20
+
+    def __post_init__(self):
+        """Validate the limit."""
+        if self.requests_per_minute <= 0 or self.burst_size < 1:
+            raise ValueError("requests_per_minute must be positive and burst_size at least 1")
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.requests_per_minute / 60.0
+
+    @property
+    def refill_seconds(self) -> float:
+        """Seconds for an empty bucket to refill completely."""
+        return self.burst_size / self.rate
+
+
+class RateLimitBackend(Protocol):
+    """Bucket storage shared by the middleware."""
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; return 0 if allowed, else seconds until one is available."""
+
+
+class MemoryBackend:
+    """Per-process buckets in LRU order, bounded to ``max_keys`` clients."""
+
+    def __init__(
+        self,
+        limit: RateLimit,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialise the backend.
+
+        Args:
+            limit: Per-client limit.
+            max_keys: Maximum clients tracked. The least recently seen is
+                evicted once its bucket has refilled; until then new clients
+                are refused.
+            clock: Time source in seconds.
+        """
+        self.limit = limit
+        self.max_keys = max_keys
+        self.clock = clock
+        self.evictions = 0
+        self.rejections = 0
+        self._capacity = float(limit.burst_size)
+        self._rate = limit.rate
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; return 0 if allowed, else the wait in seconds."""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                oldest_key, (tokens, updated) = next(iter(self._buckets.items()))
+                refill_wait = (self._capacity - tokens) / self._rate - (now - updated)
+                if refill_wait > 0.0:
+                    self.rejections += 1
+                    return refill_wait
+                del self._buckets[oldest_key]
+                self.evictions += 1
+            self._buckets[key] = [self._capacity - 1.0, now]
+            return 0.0
+
+        self._buckets.move_to_end(key)
+        tokens = min(self._capacity, bucket[0] + (now - bucket[1]) * self._rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / self._rate
+
+
+def default_shared_path() -> Path:
+    """Return the shared bucket file path (``/dev/shm`` when available)."""
+    root = Path("/dev/shm")
+    return (root if root.is_dir() else Path(tempfile.gettempdir())) / SHARED_FILE_NAME
+
+
+class SharedMemoryBackend:
+    """Buckets in a memory-mapped hash table shared by all workers on a host.
+
+    Keys are hashed with BLAKE2b (stable across processes, unlike ``hash``)
+    into an open-addressing table of ``slots`` entries. A lookup probes up to
+    eight slots and reuses an empty or fully refilled one for a new key; if
+    all are still refilling, the new key is refused until the first of them
+    has refilled. Each check holds an exclusive ``flock`` for a few struct
+    reads and one write.
+    """
+
+    def __init__(
+        self,
+        limit: RateLimit,
+        path: Optional[Union[str, Path]] = None,
+        slots: int = 65_536,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Open or create the shared table.
+
+        Args:
+            limit: Per-client limit. All workers must use the same limit.
+            path: Table file; defaults to :func:`default_shared_path`.
+            slots: Table size, a power of two (24 bytes per slot).
+            clock: Wall-clock time source, comparable across processes.
+        """
+        if slots < _MAX_PROBES or slots & (slots - 1):
+            raise ValueError(f"slots must be a power of two >= {_MAX_PROBES}, got {slots}")
+        self.limit = limit
+        self.path = Path(path) if path else default_shared_path()
+        self.slots = slots
+        self.clock = clock
+        self.rejections = 0
+        self._capacity = float(limit.burst_size)
+        self._rate = limit.rate
+
+        size = slots * _SLOT.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def close(self) -> None:
+        """Unmap the table and close the file."""
+        self._map.close()
+        os.close(self._fd)
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; return 0 if allowed, else the wait in seconds."""
+        digest = int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        now = self.clock()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            offset, refill_wait = self._find_slot(digest, now)
+            if offset is None:
+                self.rejections += 1
+                return refill_wait
+            stored, tokens, updated = _SLOT.unpack_from(self._map, offset)
+            if stored != digest:
+                tokens, updated = self._capacity, now
+            # Clocks of different workers may be a hair apart; never refill backwards
+            tokens = min(self._capacity, tokens + max(0.0, now - updated) * self._rate)
+            if tokens >= 1.0:
+                wait, tokens = 0.0, tokens - 1.0
+            else:
+                wait = (1.0 - tokens) / self._rate
+            _SLOT.pack_into(self._map, offset, digest, tokens, max(now, updated))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return wait
+
+    def _find_slot(self, digest: int, now: float) -> Tuple[Optional[int], float]:
+        """Return (slot offset, 0) or, if none is free, (None, seconds until one is)."""
+        mask = self.slots - 1
+        reusable = None
+        soonest = math.inf
+        for probe in range(_MAX_PROBES):
+            offset = ((digest + probe) & mask) * _SLOT.size
+            stored, tokens, updated = _SLOT.unpack_from(self._map, offset)
+            if stored == digest:
+                return offset, 0.0
+            refill_wait = (self._capacity - tokens) / self._rate - (now - updated)
+            if reusable is None and (stored == 0 or refill_wait <= 0.0):
+                reusable = offset
+            soonest = min(soonest, refill_wait)
+        if reusable is not None:
+            return reusable, 0.0
+        return None, soonest
+
+
+def client_ip(scope: Scope) -> str:
+    """Return the remote address of an ASGI connection."""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware rejecting requests over the per-client limit with 429."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: RateLimitBackend,
+        exempt_paths: Iterable[str] = ("/health",),
+        key_func: Callable[[Scope], str] = client_ip,
+    ):
+        """Initialise the middleware.
+
+        Args:
+            app: Wrapped ASGI application.
+            backend: Bucket storage.
+            exempt_paths: Paths never limited (health checks).
+            key_func: Maps a request scope to its client key.
+        """
+        self.app = app
+        self.backend = backend
+        self.exempt_paths = frozenset(exempt_paths)
+        self.key_func = key_func
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Pass the request through, or answer 429 if the client is over its limit."""
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.backend.acquire(self.key_func(scope))
+        if wait <= 0.0:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Rate limit exceeded"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
+
+
+def create_backend(settings: Settings) -> RateLimitBackend:
+    """Build the backend selected by ``API_RATE_LIMIT_BACKEND``."""
+    limit = RateLimit(settings.rate_limit_requests_per_minute, settings.rate_limit_burst_size)
+    if settings.rate_limit_backend == "shared":
+        return SharedMemoryBackend(limit, settings.rate_limit_shared_path)
+    return MemoryBackend(limit, max_keys=settings.rate_limit_max_clients)
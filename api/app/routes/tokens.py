@@ -0,0 +1,86 @@
+"""
+Token leaderboard and summary endpoints.
+
+Served entirely from the in-memory token snapshot published by the daily DAGs;
+no database query runs per request.
+"""
+from typing import Annotated
+
+from app.deps import get_snapshot_store
+from app.models.token_metrics import (
+    RankBy,
+    RankedToken,
+    Sparkline,
+    TokenMetrics,
+    TokenSummary,
+    TopTokensResponse,
+)
+from app.services.token_snapshot import SnapshotStore, TokenSnapshot
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+router = APIRouter(prefix="/tokens", tags=["tokens"])
+
+Store = Annotated[SnapshotStore, Depends(get_snapshot_store)]
+
+
+def _snapshot(store: SnapshotStore) -> TokenSnapshot:
+    snapshot = store.current()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Token snapshot not available yet")
+    return snapshot
+
+
+@router.get("/top", response_model=TopTokensResponse)
+async def top_tokens(
+    store: Store,
+    by: RankBy = "volume",
+    limit: Annotated[int, Query(ge=1, le=1000)] = 20,
+    sparkline: bool = True,
+):
+    """Top tracked tokens by a latest-day metric.
+
+    ``volume`` ranks by USD volume and leaves out tokens without a price;
+    ``anomaly_score`` lists the most anomalous first.
+    """
+    snapshot = _snapshot(store)
+    if by not in snapshot.rankings:
+        raise HTTPException(status_code=400, detail=f"Snapshot has no ranking by {by}")
+
+    tokens = [
+        RankedToken(
+            rank=rank,
+            **snapshot.tokens[index],
+            metrics=TokenMetrics.model_validate(snapshot.metrics(index)),
+            sparkline=snapshot.sparkline(index) if sparkline else None,
+        )
+        for rank, index in enumerate(snapshot.top(by, limit), start=1)
+    ]
+    return TopTokensResponse(
+        as_of=snapshot.as_of,
+        generated_at=snapshot.generated_at,
+        by=by,
+        sparkline_start=snapshot.sparkline_start,
+        tokens=tokens,
+    )
+
+
+@router.get("/{token}/summary", response_model=TokenSummary)
+async def token_summary(token: str, store: Store):
+    """Latest metrics, ranks and sparkline of a token, by address or symbol."""
+    snapshot = _snapshot(store)
+    index = snapshot.find(token)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Token {token} is not tracked")
+
+    return TokenSummary(
+        as_of=snapshot.as_of,
+        generated_at=snapshot.generated_at,
+        **snapshot.tokens[index],
+        metrics=TokenMetrics.model_validate(snapshot.metrics(index)),
+        ranks=snapshot.ranks(index),
+        sparkline=Sparkline(
+            metric=snapshot.sparkline_metric,
+            start=snapshot.sparkline_start,
+            values=snapshot.sparkline(index),
+        ),
+    )
@@ -0,0 +1,198 @@
+"""
+Token leaderboard snapshot served from memory.
+
+Reads the snapshots published by the daily DAGs (format documented in
+``pipelines/libs/token_snapshot.py``). A snapshot file is memory-mapped
+read-only and its arrays are exposed as ``memoryview`` casts over the mapping:
+loading parses only the small JSON header, and requests read metrics, ranks
+and sparklines straight from the mapped pages without copying the file.
+
+:class:`SnapshotStore` watches the snapshot directory's ``CURRENT`` pointer
+and swaps in a new snapshot when it changes. Requests already holding the old
+snapshot keep a valid mapping until they finish.
+"""
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union, cast
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OTSNAP01"
+POINTER_FILE = "CURRENT"
+
+_PREAMBLE = struct.Struct("<8sII")
+
+# Metrics stored as float64 but served as integers
+_COUNT_METRICS = frozenset({"tx_count", "unique_addresses"})
+
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, truncated or in an unknown format."""
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class TokenSnapshot:
+    """Read-only view of one snapshot file."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Map a snapshot file.
+
+        Raises:
+            SnapshotError: If the file is not a valid snapshot.
+        """
+        if sys.byteorder != "little":
+            raise SnapshotError("Snapshots store little-endian arrays")
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _PREAMBLE.size:
+            raise SnapshotError(f"{self.path.name}: truncated")
+        magic, header_length, _ = _PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path.name}: unknown format {magic!r}")
+        header = json.loads(self._map[_PREAMBLE.size : _PREAMBLE.size + header_length])
+
+        base = _align(_PREAMBLE.size + header_length)
+        view = memoryview(self._map)
+        self._arrays: Dict[str, memoryview] = {}
+        for name, spec in header["arrays"].items():
+            start = base + spec["offset"]
+            end = start + spec["length"] * struct.calcsize(spec["format"])
+            if end > len(self._map):
+                raise SnapshotError(f"{self.path.name}: array {name} is truncated")
+            self._arrays[name] = view[start:end].cast(spec["format"])
+
+        self.as_of = date.fromisoformat(header["as_of"])
+        self.generated_at: str = header["generated_at"]
+        self.metric_names: List[str] = header["metrics"]
+        self.rankings: List[str] = header["rankings"]
+        self.sparkline_metric: str = header["sparkline"]["metric"]
+        self.sparkline_start = date.fromisoformat(header["sparkline"]["start"])
+        self.sparkline_days: int = header["sparkline"]["days"]
+        self.tokens: List[Dict[str, Optional[str]]] = header["tokens"]
+
+        self._lookup: Dict[str, int] = {}
+        for i, token in enumerate(self.tokens):
+            if token.get("symbol"):
+                self._lookup.setdefault(token["symbol"].lower(), i)
+            self._lookup[token["address"].lower()] = i
+        self._positions = {
+            metric: {index: rank for rank, index in enumerate(self._arrays[f"rank_{metric}"])}
+            for metric in self.rankings
+        }
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def find(self, token: str) -> Optional[int]:
+        """Return the index of a token by address or symbol (case-insensitive)."""
+        return self._lookup.get(token.lower())
+
+    def top(self, metric: str, limit: int) -> List[int]:
+        """Return indices of the best-ranked tokens by ``metric``."""
+        return self._arrays[f"rank_{metric}"][:limit].tolist()
+
+    def ranks(self, index: int) -> Dict[str, Optional[int]]:
+        """Return the 1-based rank of a token in every ranking (None if unranked)."""
+        return {
+            metric: (positions[index] + 1 if index in positions else None)
+            for metric, positions in self._positions.items()
+        }
+
+    def metrics(self, index: int) -> Dict[str, Union[int, float, None]]:
+        """Return a token's latest metrics; counts are ints and missing values None."""
+        width = len(self.metric_names)
+        row = cast(
+            List[float], self._arrays["metrics"][index * width : (index + 1) * width].tolist()
+        )
+        metrics: Dict[str, Union[int, float, None]] = {}
+        for name, value in zip(self.metric_names, row):
+            if math.isnan(value):
+                metrics[name] = None
+            else:
+                metrics[name] = int(value) if name in _COUNT_METRICS else value
+        return metrics
+
+    def sparkline(self, index: int) -> List[float]:
+        """Return a token's daily sparkline values, oldest first."""
+        days = self.sparkline_days
+        return cast(
+            List[float], self._arrays["sparklines"][index * days : (index + 1) * days].tolist()
+        )
+
+
+class SnapshotStore:
+    """Holds the current snapshot and hot-swaps it when a new one is published."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        check_interval_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialise the store.
+
+        Args:
+            directory: Snapshot directory containing the ``CURRENT`` pointer.
+            check_interval_seconds: Minimum time between pointer checks.
+            clock: Time source in seconds.
+        """
+        self.directory = Path(directory)
+        self.check_interval_seconds = check_interval_seconds
+        self.clock = clock
+        self._snapshot: Optional[TokenSnapshot] = None
+        self._pointer: Optional[Tuple[int, int, int]] = None
+        self._next_check = 0.0
+
+    def current(self) -> Optional[TokenSnapshot]:
+        """Return the latest snapshot, checking for a new one at most every interval."""
+        now = self.clock()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval_seconds
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """Load the snapshot named by ``CURRENT`` if it changed.
+
+        A snapshot that fails to load is logged and skipped; the previous one
+        stays in service and the load is retried on the next check.
+
+        Returns:
+            True if a new snapshot was swapped in.
+        """
+        pointer = self.directory / POINTER_FILE
+        try:
+            stat = os.stat(pointer)
+        except FileNotFoundError:
+            return False
+        # Publishing replaces the pointer file, so a new inode or mtime means a new snapshot
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key == self._pointer:
+            return False
+
+        try:
+            snapshot = TokenSnapshot(self.directory / pointer.read_text().strip())
+        except (OSError, ValueError, KeyError, SnapshotError) as exc:
+            logger.warning("Cannot load token snapshot from %s: %s", self.directory, exc)
+            return False
+
+        self._snapshot, self._pointer = snapshot, key
+        logger.info(
+            "Loaded token snapshot %s (as of %s, %d tokens)",
+            snapshot.path.name,
+            snapshot.as_of,
+            len(snapshot),
+        )
+        return True
@@ -0,0 +1,125 @@
+"""Shared fixtures for the API tests."""
+
+import json
+import os
+import struct
+import tempfile
+from array import array
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import pytest
+from app.services.token_snapshot import MAGIC, POINTER_FILE
+
+METRIC_NAMES = [
+    "volume",
+    "tx_count",
+    "unique_addresses",
+    "price_change",
+    "anomaly_score",
+    "volume_usd",
+]
+# Rankings: name -> (metric, sort descending); tokens with a NaN value are left out
+RANKINGS = {
+    "volume": ("volume_usd", True),
+    "tx_count": ("tx_count", True),
+    "unique_addresses": ("unique_addresses", True),
+    "anomaly_score": ("anomaly_score", False),
+}
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Return a clock that only moves when a test advances it."""
+    return FakeClock()
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _replace(path: Path, content: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _write_snapshot(
+    directory: Path,
+    as_of: date,
+    tokens: Sequence[Mapping[str, Optional[str]]],
+    metrics: Sequence[Sequence[float]],
+    sparklines: Sequence[Sequence[float]],
+) -> Path:
+    """Write a snapshot in the published file format and point ``CURRENT`` at it.
+
+    Mirrors the pipeline writer with the standard library only, so the API
+    tests need neither numpy nor pandas.
+
+    Args:
+        directory: Snapshot directory.
+        as_of: Snapshot date; the sparklines end on it.
+        tokens: Token ``address``, ``symbol`` and ``name``, in index order.
+        metrics: Latest values per token, in ``METRIC_NAMES`` order (NaN if unset).
+        sparklines: Daily volumes per token, oldest first.
+    """
+    days = len(sparklines[0])
+    arrays: Dict[str, array] = {
+        "metrics": array("d", [value for row in metrics for value in row]),
+        "sparklines": array("d", [value for row in sparklines for value in row]),
+    }
+    for ranking, (metric, descending) in RANKINGS.items():
+        column = METRIC_NAMES.index(metric)
+        ranked: List[int] = [i for i, row in enumerate(metrics) if row[column] == row[column]]
+        ranked.sort(key=lambda i: -metrics[i][column] if descending else metrics[i][column])
+        arrays[f"rank_{ranking}"] = array("I", ranked)
+
+    header = {
+        "as_of": as_of.isoformat(),
+        "generated_at": "2024-04-01T00:00:00+00:00",
+        "metrics": METRIC_NAMES,
+        "rankings": list(RANKINGS),
+        "sparkline": {
+            "metric": "volume",
+            "start": (as_of - timedelta(days=days - 1)).isoformat(),
+            "days": days,
+        },
+        "tokens": [dict(token) for token in tokens],
+        "arrays": {},
+    }
+    data = bytearray()
+    for name, values in arrays.items():
+        data.extend(b"\0" * (_align(len(data)) - len(data)))
+        header["arrays"][name] = {
+            "offset": len(data),
+            "length": len(values),
+            "format": values.typecode,
+        }
+        data.extend(values.tobytes())
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    preamble = struct.pack("<8sII", MAGIC, len(header_bytes), 0) + header_bytes
+    content = preamble + b"\0" * (_align(len(preamble)) - len(preamble)) + data
+
+    path = directory / f"token_snapshot_{len(list(directory.glob('*.snap'))):04d}.snap"
+    _replace(path, content)
+    _replace(directory / POINTER_FILE, path.name.encode("utf-8"))
+    return path
+
+
+@pytest.fixture
+def write_snapshot():
+    """Return a function writing snapshots (see :func:`_write_snapshot`)."""
+    return _write_snapshot
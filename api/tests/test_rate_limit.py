@@ -0,0 +1,136 @@
+"""Tests for the token bucket rate limiting middleware."""
+
+import multiprocessing
+
+import pytest
+from app.main import app as api_app
+from app.rate_limit import MemoryBackend, RateLimit, RateLimitMiddleware, SharedMemoryBackend
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+LIMIT = RateLimit(requests_per_minute=60, burst_size=3)
+
+
+@pytest.fixture(params=["memory", "shared"])
+def backend_factory(request, tmp_path):
+    """Build either backend with a fake clock."""
+
+    def build(clock, **kwargs):
+        if request.param == "memory":
+            return MemoryBackend(LIMIT, clock=clock, **kwargs)
+        return SharedMemoryBackend(LIMIT, tmp_path / "buckets.bin", slots=64, clock=clock)
+
+    return build
+
+
+@pytest.mark.unit
+def test_bucket_allows_burst_then_refills(backend_factory, clock):
+    """A client gets its burst, then one request per refill interval."""
+    backend = backend_factory(clock)
+
+    assert [backend.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.acquire("a") == pytest.approx(1.0)
+    assert backend.acquire("b") == 0.0
+
+    clock.now += 0.5
+    assert backend.acquire("a") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert backend.acquire("a") == 0.0
+    clock.now += 60
+    assert [backend.acquire("a") for _ in range(4)][-1] > 0
+
+
+@pytest.mark.unit
+def test_memory_backend_evicts_only_refilled_buckets(clock):
+    """At max_keys new clients wait until the least recently seen bucket has refilled."""
+    backend = MemoryBackend(LIMIT, max_keys=2, clock=clock)
+    for key in ("a", "a", "a", "b", "b", "b"):
+        backend.acquire(key)
+    clock.now += 1
+    assert backend.acquire("a") == 0.0  # touches "a", so "b" is now the oldest
+
+    assert backend.acquire("c") == pytest.approx(2.0)
+    assert len(backend) == 2 and backend.evictions == 0 and backend.rejections == 1
+    assert backend.acquire("b") == 0.0  # still tracked: one token refilled, two to go
+
+    clock.now += LIMIT.refill_seconds
+    assert backend.acquire("c") == 0.0
+    assert len(backend) == 2 and backend.evictions == 1
+
+
+@pytest.mark.unit
+def test_shared_backend_reuses_only_idle_slots(tmp_path, clock):
+    """Slots of fully refilled buckets are reused; active ones make new clients wait."""
+    backend = SharedMemoryBackend(LIMIT, tmp_path / "buckets.bin", slots=8, clock=clock)
+    for i in range(8):
+        backend.acquire(f"client-{i}")
+    clock.now += LIMIT.refill_seconds
+
+    for i in range(8, 16):
+        assert backend.acquire(f"client-{i}") == 0.0
+    assert backend.rejections == 0
+
+    assert backend.acquire("one-more") == pytest.approx(1.0)
+    assert backend.rejections == 1
+    assert [backend.acquire(f"client-{i}") for i in range(8, 16)] == [0.0] * 8
+
+    clock.now += LIMIT.refill_seconds
+    assert backend.acquire("one-more") == 0.0
+
+
+def _hammer(path: str, start, results) -> None:
+    backend = SharedMemoryBackend(RateLimit(requests_per_minute=1, burst_size=20), path)
+    start.wait()
+    results.put(sum(backend.acquire("client") == 0.0 for _ in range(50)))
+
+
+@pytest.mark.unit
+def test_shared_backend_enforces_one_limit_across_processes(tmp_path):
+    """Four worker processes together get exactly one burst for a client."""
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Barrier(4), context.Queue()
+    workers = [
+        context.Process(target=_hammer, args=(str(tmp_path / "buckets.bin"), start, results))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    allowed = sum(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert allowed == 20
+
+
+@pytest.mark.unit
+def test_middleware_returns_429_with_retry_after():
+    """Requests over the limit get 429 and Retry-After; exempt paths pass."""
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, backend=MemoryBackend(LIMIT))
+
+    @app.get("/tokens")
+    async def tokens():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    client = TestClient(app)
+    assert [client.get("/tokens").status_code for _ in range(3)] == [200, 200, 200]
+
+    response = client.get("/tokens")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"detail": "Rate limit exceeded"}
+    assert client.get("/health").status_code == 200
+
+
+@pytest.mark.unit
+def test_main_app_applies_configured_limit():
+    """The API app enforces the default settings: a burst of 20 per client."""
+    client = TestClient(api_app)
+    statuses = [client.get("/").status_code for _ in range(21)]
+
+    assert statuses == [200] * 20 + [429]
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,212 @@
+"""Tests for the snapshot-backed token leaderboard and summary endpoints."""
+
+import math
+import os
+from datetime import date, timedelta
+
+import pytest
+from app.deps import get_snapshot_store
+from app.routes import tokens
+from app.services.token_snapshot import POINTER_FILE, SnapshotError, SnapshotStore, TokenSnapshot
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+AS_OF = date(2024, 3, 31)
+USDT = "0xdac17f958d2ee523a2206206994597c13d831ec7"
+WETH = "0xc02aaa39b223fe8d0a0e5c4f27ead083c756cc2"
+LINK = "0x514910771af9ca656af840dff83e8264ecf986ca"
+TOKENS = [
+    {"address": USDT, "symbol": "USDT", "name": "Tether USD"},
+    {"address": WETH, "symbol": "WETH", "name": "Wrapped Ether"},
+    {"address": LINK, "symbol": "LINK", "name": "Chainlink"},
+]
+
+
+@pytest.fixture
+def publish(tmp_path, write_snapshot):
+    """Publish snapshots into tmp_path where WETH leads by USD volume and is flagged.
+
+    USDT is priced at $1 and WETH at $3000; LINK has no price.
+    """
+
+    def publish_(as_of=AS_OF, usdt_volume=9000.0):
+        metrics = [
+            [usdt_volume, 500, 300, 0.0, math.nan, usdt_volume],
+            [60000.0, 800, 200, 0.05, -0.3, 60000.0 * 3000],
+            [0.0, 0, 0, 0.0, math.nan, math.nan],
+        ]
+        sparklines = [[usdt_volume] * 30, [2000.0 * (i + 1) for i in range(30)], [0.0] * 30]
+        return write_snapshot(tmp_path, as_of, TOKENS, metrics, sparklines)
+
+    return publish_
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Client for an app serving the tokens router from a snapshot store."""
+    store = SnapshotStore(tmp_path, check_interval_seconds=0)
+    app = FastAPI()
+    app.include_router(tokens.router)
+    app.dependency_overrides[get_snapshot_store] = lambda: store
+    return TestClient(app)
+
+
+@pytest.mark.unit
+def test_snapshot_reader(publish):
+    """The reader exposes the published metrics, rankings and sparklines."""
+    snapshot = TokenSnapshot(publish())
+
+    assert len(snapshot) == 3
+    assert snapshot.as_of == AS_OF
+    assert snapshot.find("weth") == snapshot.find(WETH.upper()) == 1
+    assert snapshot.find("0xdead") is None
+    assert snapshot.top("volume", 10) == [1, 0]
+    assert snapshot.top("anomaly_score", 10) == [1]
+    assert snapshot.ranks(2) == {
+        "volume": None,
+        "tx_count": 3,
+        "unique_addresses": 3,
+        "anomaly_score": None,
+    }
+    assert snapshot.metrics(0) == {
+        "volume": 9000.0,
+        "tx_count": 500.0,
+        "unique_addresses": 300.0,
+        "price_change": 0.0,
+        "anomaly_score": None,
+        "volume_usd": 9000.0,
+    }
+    assert snapshot.sparkline(1) == pytest.approx([2000.0 * (i + 1) for i in range(30)])
+
+
+@pytest.mark.unit
+def test_reader_rejects_invalid_files(tmp_path, publish):
+    """Files that are not snapshots raise SnapshotError."""
+    path = tmp_path / "bad.snap"
+    path.write_bytes(b"NOTASNAP" + b"\0" * 64)
+    with pytest.raises(SnapshotError):
+        TokenSnapshot(path)
+
+    good = publish().read_bytes()
+    path.write_bytes(good[: len(good) - 8])
+    with pytest.raises(SnapshotError):
+        TokenSnapshot(path)
+
+
+@pytest.mark.unit
+def test_store_hot_swaps_on_new_snapshot(tmp_path, publish, clock):
+    """The store picks up a new snapshot only after the check interval."""
+    store = SnapshotStore(tmp_path, check_interval_seconds=5, clock=clock)
+    assert store.current() is None
+
+    publish(AS_OF - timedelta(days=1))
+    clock.now += 5
+    first = store.current()
+    assert first.as_of == AS_OF - timedelta(days=1)
+
+    publish(AS_OF)
+    assert store.current() is first
+    clock.now += 5
+    assert store.current().as_of == AS_OF
+    # A swapped-out snapshot stays readable for requests still holding it
+    assert first.top("tx_count", 1) == [1]
+
+
+@pytest.mark.unit
+def test_store_keeps_serving_when_new_snapshot_is_broken(tmp_path, publish):
+    """A pointer to a missing or corrupt file leaves the current snapshot in place."""
+    store = SnapshotStore(tmp_path, check_interval_seconds=0)
+    publish()
+    assert store.refresh()
+
+    (tmp_path / "broken.snap").write_bytes(b"garbage")
+    (tmp_path / POINTER_FILE).write_text("broken.snap")
+    assert not store.refresh()
+    assert store.current().as_of == AS_OF
+
+    os.remove(tmp_path / POINTER_FILE)
+    assert store.current().as_of == AS_OF
+
+
+@pytest.mark.unit
+def test_top_tokens(client, publish):
+    """/tokens/top ranks tokens by the requested metric."""
+    publish()
+
+    response = client.get("/tokens/top", params={"limit": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["as_of"] == "2024-03-31"
+    assert body["by"] == "volume"
+    assert [(t["rank"], t["symbol"]) for t in body["tokens"]] == [(1, "WETH"), (2, "USDT")]
+    assert body["tokens"][1]["metrics"]["volume"] == 9000.0
+    assert body["tokens"][0]["metrics"]["volume_usd"] == 1.8e8
+    assert len(body["tokens"][0]["sparkline"]) == 30
+
+    response = client.get("/tokens/top", params={"by": "anomaly_score", "sparkline": False})
+    tokens_ = response.json()["tokens"]
+    assert [t["symbol"] for t in tokens_] == ["WETH"]
+    assert tokens_[0]["metrics"]["anomaly_score"] == -0.3
+    assert tokens_[0]["sparkline"] is None
+
+
+@pytest.mark.unit
+def test_top_tokens_validates_parameters(client, publish):
+    """Unknown rankings and out-of-range limits are rejected."""
+    publish()
+
+    assert client.get("/tokens/top", params={"by": "price"}).status_code == 422
+    assert client.get("/tokens/top", params={"limit": 0}).status_code == 422
+
+
+@pytest.mark.unit
+def test_token_summary(client, publish):
+    """/tokens/{token}/summary resolves addresses and symbols."""
+    publish()
+
+    response = client.get(f"/tokens/{LINK}/summary")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["symbol"] == "LINK"
+    assert body["metrics"]["volume"] == 0.0
+    assert body["metrics"]["volume_usd"] is None
+    assert body["ranks"] == {
+        "volume": None,
+        "tx_count": 3,
+        "unique_addresses": 3,
+        "anomaly_score": None,
+    }
+    assert body["sparkline"]["start"] == "2024-03-02"
+    assert body["sparkline"]["values"] == [0.0] * 30
+
+    assert client.get("/tokens/usdt/summary").json()["address"] == USDT
+    assert client.get("/tokens/0xdead/summary").status_code == 404
+
+
+@pytest.mark.unit
+def test_summary_serves_missing_counts_as_null(client, tmp_path, write_snapshot):
+    """Counts are served as integers, and as null when the snapshot has none."""
+    metrics = [[1.0, 7.0, 3.0, 0.0, math.nan, 1.0], [1.0] + [math.nan] * 5]
+    write_snapshot(tmp_path, AS_OF, TOKENS[:2], metrics, [[1.0] * 30, [1.0] * 30])
+
+    counts = client.get("/tokens/usdt/summary").json()["metrics"]
+    assert (counts["tx_count"], counts["unique_addresses"]) == (7, 3)
+    assert isinstance(counts["tx_count"], int)
+
+    response = client.get("/tokens/weth/summary")
+    assert response.status_code == 200
+    assert response.json()["metrics"]["tx_count"] is None
+    assert response.json()["ranks"]["tx_count"] is None
+
+
+@pytest.mark.unit
+def test_endpoints_serve_new_snapshot_without_restart(client, publish):
+    """A newly published snapshot is served on the next request."""
+    assert client.get("/tokens/top").status_code == 503
+
+    publish(usdt_volume=1e6)
+    assert client.get("/tokens/usdt/summary").json()["metrics"]["volume"] == 1e6
+
+    publish(usdt_volume=1e9)
+    body = client.get("/tokens/top", params={"limit": 1}).json()
+    assert body["tokens"][0]["symbol"] == "USDT"
@@ -11,6 +11,7 @@
 #   - eth.transactions.raw: Transaction data
 #   - eth.logs.raw: Event logs from smart contracts
 #   - market.prices.raw: Spot price data for tokens
+#   - eth.blocks.raw.dlq / eth.logs.raw.dlq: Rejected raw messages (30 day retention)
 #
 # Configuration:
 #   - 1 partition (dev environment, scale to 3+ in production)
@@ -55,10 +56,13 @@ REPLICATION_FACTOR=1
 RETENTION_MS=604800000  # 7 days
 COMPRESSION_TYPE=snappy
 
+DLQ_RETENTION_MS=2592000000  # 30 days
+
 # Function to create topic
 create_topic() {
     local topic_name=$1
     local description=$2
+    local retention_ms=${3:-$RETENTION_MS}
 
     echo "Creating topic: $topic_name"
     echo "  Description: $description"
@@ -69,7 +73,7 @@ create_topic() {
         --topic "$topic_name" \
         --partitions $PARTITIONS \
         --replication-factor $REPLICATION_FACTOR \
-        --config retention.ms=$RETENTION_MS \
+        --config retention.ms=$retention_ms \
         --config compression.type=$COMPRESSION_TYPE \
         --config cleanup.policy=delete
 
@@ -90,6 +94,8 @@ create_topic "eth.blocks.raw" "Ethereum block headers and metadata"
 create_topic "eth.transactions.raw" "Ethereum transaction data"
 create_topic "eth.logs.raw" "Ethereum event logs from smart contracts"
 create_topic "market.prices.raw" "Spot price data for tracked tokens"
+create_topic "eth.blocks.raw.dlq" "Rejected block messages (dead-letter queue)" $DLQ_RETENTION_MS
+create_topic "eth.logs.raw.dlq" "Rejected log messages (dead-letter queue)" $DLQ_RETENTION_MS
 
 # Verify topics were created
 echo "Verifying topic creation..."
@@ -102,7 +108,7 @@ echo "$TOPICS"
 echo ""
 
 # Check that all expected topics exist
-EXPECTED_TOPICS=("eth.blocks.raw" "eth.transactions.raw" "eth.logs.raw" "market.prices.raw")
+EXPECTED_TOPICS=("eth.blocks.raw" "eth.transactions.raw" "eth.logs.raw" "market.prices.raw" "eth.blocks.raw.dlq" "eth.logs.raw.dlq")
 MISSING_TOPICS=()
 
 for topic in "${EXPECTED_TOPICS[@]}"; do
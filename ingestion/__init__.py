@@ -0,0 +1 @@
+# Oracul ingestion services
@@ -0,0 +1,279 @@
+"""
+Ethereum mainnet log scanner for tracked-token Transfer events.
+
+Fetches only the logs the platform uses: ``eth_getLogs`` is called with an
+address filter built from ``config/base/tokens.yml`` and the ERC-20 Transfer
+topic, so the node does the filtering instead of shipping every log of every
+block. Backfills scan block ranges; when following the chain head with headers
+already in hand (e.g. from the block scanner), each header's ``logsBloom`` is
+tested locally first and blocks that cannot contain a tracked Transfer are
+never requested.
+
+Scanned logs use the message shape expected on ``eth.logs.raw``.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import yaml
+from eth_hash.auto import keccak
+
+from ingestion.common.rpc_client import RpcError
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+TOKENS_CONFIG = Path(__file__).resolve().parents[3] / "config" / "base" / "tokens.yml"
+LOGS_TOPIC = "eth.logs.raw"
+
+# Default from chains.yml: eth_mainnet.max_block_range_per_request
+DEFAULT_MAX_BLOCK_RANGE = 100
+
+_BLOOM_BITS = 2048
+# Node errors meaning "too many results, ask for a smaller range". -32005 is
+# "limit exceeded"; -32602 is generic "invalid params", which some providers
+# also use for result/range limits, so it only counts with a limit message.
+_LIMIT_EXCEEDED_CODE = -32005
+_INVALID_PARAMS_CODE = -32602
+_RANGE_LIMIT_MESSAGE = re.compile(
+    r"exceed|limit|more than|too (many|large|big)|response size|block range", re.IGNORECASE
+)
+
+_PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def load_tracked_token_addresses(
+    path: Union[str, Path] = TOKENS_CONFIG, min_priority: Optional[str] = None
+) -> List[str]:
+    """Return lower-cased contract addresses of tracked tokens.
+
+    Args:
+        path: Path to ``tokens.yml``.
+        min_priority: Only include tokens at or above this priority
+            (``low``, ``medium`` or ``high``).
+    """
+    with open(path) as f:
+        tokens = yaml.safe_load(f)["tokens"]["tracked_tokens"]
+
+    floor = _PRIORITY_RANK[min_priority] if min_priority else 0
+    return sorted(
+        {
+            t["address"].lower()
+            for t in tokens
+            if _PRIORITY_RANK.get(t.get("priority", "low"), 0) >= floor
+        }
+    )
+
+
+def build_log_filter(
+    addresses: Optional[Sequence[str]], topics: Sequence[str] = (TRANSFER_TOPIC,)
+) -> Dict[str, Any]:
+    """Build the address/topic part of an ``eth_getLogs`` filter.
+
+    Args:
+        addresses: Contract addresses to match (any of), or None for any
+            contract.
+        topics: Accepted values for topic0 (any of).
+    """
+    log_filter: Dict[str, Any] = {"topics": [list(topics)]}
+    if addresses is not None:
+        log_filter["address"] = [a.lower() for a in addresses]
+    return log_filter
+
+
+@lru_cache(maxsize=65536)
+def _bloom_mask(item: bytes) -> int:
+    """Return the three-bit logsBloom mask for an address or topic."""
+    digest = keccak(item)
+    mask = 0
+    for i in (0, 2, 4):
+        mask |= 1 << (((digest[i] << 8) | digest[i + 1]) % _BLOOM_BITS)
+    return mask
+
+
+def compute_logs_bloom(logs: Iterable[Mapping[str, Any]]) -> str:
+    """Compute a block's ``logsBloom`` hex string from its RPC log objects."""
+    bloom = 0
+    for log in logs:
+        bloom |= _bloom_mask(bytes.fromhex(log["address"][2:]))
+        for topic in log["topics"]:
+            bloom |= _bloom_mask(bytes.fromhex(topic[2:]))
+    return "0x" + f"{bloom:0512x}"
+
+
+class BloomMatcher:
+    """Local ``logsBloom`` test for "has a log from any address with any topic0".
+
+    The per-item bit masks are computed once, so testing a header is one hex
+    parse and a few integer ANDs.
+    """
+
+    def __init__(
+        self, addresses: Optional[Iterable[str]], topics: Iterable[str] = (TRANSFER_TOPIC,)
+    ):
+        """Precompute bloom masks for the given addresses (None: any) and topics."""
+        self.address_masks = (
+            None if addresses is None else [_bloom_mask(bytes.fromhex(a[2:])) for a in addresses]
+        )
+        self.topic_masks = [_bloom_mask(bytes.fromhex(t[2:])) for t in topics]
+
+    def may_contain(self, logs_bloom: str) -> bool:
+        """Return False only if the block certainly has no matching log."""
+        bloom = int(logs_bloom, 16)
+        if not any(bloom & m == m for m in self.topic_masks):
+            return False
+        if self.address_masks is None:
+            return True
+        return any(bloom & m == m for m in self.address_masks)
+
+
+def _is_range_too_large(exc: RpcError) -> bool:
+    """Return True if an ``eth_getLogs`` error asks for a smaller block range."""
+    if exc.code == _LIMIT_EXCEEDED_CODE:
+        return True
+    return exc.code == _INVALID_PARAMS_CODE and bool(_RANGE_LIMIT_MESSAGE.search(exc.message))
+
+
+def _to_int(value: Union[int, str]) -> int:
+    return value if isinstance(value, int) else int(value, 16)
+
+
+def normalize_log(log: Mapping[str, Any]) -> Dict[str, Any]:
+    """Convert an RPC log object to the ``eth.logs.raw`` message shape."""
+    return {
+        "block_number": _to_int(log["blockNumber"]),
+        "block_hash": log.get("blockHash"),
+        "transaction_hash": log["transactionHash"],
+        "log_index": _to_int(log["logIndex"]),
+        "address": log["address"].lower(),
+        "topics": list(log["topics"]),
+        "data": log["data"],
+    }
+
+
+@dataclass
+class ScanStats:
+    """Per-scan counters for comparing scanning strategies."""
+
+    blocks: int = 0
+    blocks_skipped: int = 0
+    requests: int = 0
+    logs: int = 0
+
+
+class LogScanner:
+    """Scan block ranges for tracked-token Transfer logs."""
+
+    def __init__(
+        self,
+        rpc: Any,
+        addresses: Optional[Sequence[str]],
+        topics: Sequence[str] = (TRANSFER_TOPIC,),
+        max_block_range: int = DEFAULT_MAX_BLOCK_RANGE,
+        use_bloom: bool = True,
+    ):
+        """Initialise the scanner.
+
+        Args:
+            rpc: Client with a ``call(method, params)`` method.
+            addresses: Contract addresses to scan, or None for every
+                contract emitting one of ``topics``.
+            topics: Accepted topic0 values.
+            max_block_range: Maximum blocks per ``eth_getLogs`` request.
+            use_bloom: Skip blocks whose ``logsBloom`` rules out a match in
+                :meth:`scan_blocks`.
+        """
+        self.rpc = rpc
+        self.log_filter = build_log_filter(addresses, topics)
+        self.bloom = BloomMatcher(self.log_filter.get("address"), topics)
+        self.max_block_range = max_block_range
+        self.use_bloom = use_bloom
+        self.stats = ScanStats()
+
+    def scan_range(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """Return tracked Transfer logs in ``[from_block, to_block]`` (backfill mode).
+
+        Issues one filtered ``eth_getLogs`` per ``max_block_range`` blocks.
+
+        Returns:
+            Logs in ``eth.logs.raw`` message shape, in chain order.
+        """
+        self.stats.blocks += to_block - from_block + 1
+        logs: List[Dict[str, Any]] = []
+        for start in range(from_block, to_block + 1, self.max_block_range):
+            end = min(start + self.max_block_range - 1, to_block)
+            logs.extend(self._get_logs_range(start, end))
+        self.stats.logs += len(logs)
+        return logs
+
+    def scan_blocks(self, headers: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        """Return tracked Transfer logs for blocks whose headers are in hand (head mode).
+
+        Each block is fetched by ``blockHash``, so the logs always belong to
+        the exact header seen (no reorg mix-ups). Blocks whose ``logsBloom``
+        rules out a tracked Transfer are skipped without an RPC call.
+
+        Args:
+            headers: Block headers with ``hash`` and ``logsBloom``.
+
+        Returns:
+            Logs in ``eth.logs.raw`` message shape, in header order.
+        """
+        logs: List[Dict[str, Any]] = []
+        for header in headers:
+            self.stats.blocks += 1
+            if self.use_bloom and not self.bloom.may_contain(header["logsBloom"]):
+                self.stats.blocks_skipped += 1
+                continue
+            self.stats.requests += 1
+            result = self.rpc.call("eth_getLogs", [dict(self.log_filter, blockHash=header["hash"])])
+            logs.extend(normalize_log(log) for log in result)
+        self.stats.logs += len(logs)
+        return logs
+
+    def _get_logs_range(self, start: int, end: int) -> List[Dict[str, Any]]:
+        params = dict(self.log_filter, fromBlock=hex(start), toBlock=hex(end))
+        self.stats.requests += 1
+        try:
+            result = self.rpc.call("eth_getLogs", [params])
+        except RpcError as exc:
+            if not _is_range_too_large(exc) or start == end:
+                raise
+            middle = (start + end) // 2
+            logger.debug("Splitting eth_getLogs range %d-%d: %s", start, end, exc.message)
+            return self._get_logs_range(start, middle) + self._get_logs_range(middle + 1, end)
+        return [normalize_log(log) for log in result]
+
+
+def publish_logs(
+    producer: Any,
+    logs: Iterable[Mapping[str, Any]],
+    topic: str = LOGS_TOPIC,
+    send_timeout: float = 60.0,
+) -> int:
+    """Send scanned logs to Kafka, keyed by transaction hash.
+
+    Returns:
+        Number of messages sent and acknowledged by the broker.
+
+    Raises:
+        Exception: The error of the first send that failed (``flush()`` alone
+            only logs it).
+    """
+    futures = [
+        producer.send(
+            topic,
+            value=json.dumps(log).encode("utf-8"),
+            key=log["transaction_hash"].encode("utf-8"),
+        )
+        for log in logs
+    ]
+    producer.flush()
+    for future in futures:
+        future.get(timeout=send_timeout)
+    return len(futures)
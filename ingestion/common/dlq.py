@@ -0,0 +1,226 @@
+"""
+Dead-letter queue helpers for raw topic loaders.
+
+Records that fail validation are published to ``<topic>.dlq`` wrapped in a JSON
+envelope that keeps the original payload byte-for-byte (base64) alongside where
+it came from and why it was rejected. :func:`replay_dead_letters` re-feeds those
+payloads to their source topic once the cause has been fixed.
+"""
+
+import base64
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DLQ_SUFFIX = ".dlq"
+
+# Record headers; kept small so DLQ topics can be filtered without decoding
+HEADER_ERROR_TYPE = "dlq.error_type"
+HEADER_SOURCE_TOPIC = "dlq.source_topic"
+HEADER_ATTEMPT = "dlq.attempt"
+
+
+def dlq_topic(topic: str) -> str:
+    """Return the dead-letter topic for a source topic."""
+    return f"{topic}{DLQ_SUFFIX}"
+
+
+def record_attempt(headers: Optional[List[Tuple[str, bytes]]]) -> int:
+    """Return how many times a record has already been dead-lettered."""
+    for name, value in headers or ():
+        if name == HEADER_ATTEMPT:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return 0
+    return 0
+
+
+def wait_for_delivery(futures: Iterable[Any], timeout: Optional[float] = None) -> None:
+    """Block until every send has been acknowledged by the broker.
+
+    kafka-python's ``flush()`` only logs a failed send; the error is set on the
+    future returned by ``send()``. Calling ``get()`` re-raises it, so offsets
+    are never committed past a record that was not written.
+
+    Args:
+        futures: Futures returned by ``producer.send``.
+        timeout: Seconds to wait for each send.
+
+    Raises:
+        Exception: The send error (``KafkaError`` or ``KafkaTimeoutError``).
+    """
+    for future in futures:
+        future.get(timeout=timeout)
+
+
+def build_dead_letter(
+    record: Any,
+    error_type: str,
+    detail: str,
+    field: Optional[str] = None,
+    consumer_group: Optional[str] = None,
+) -> Tuple[bytes, List[Tuple[str, bytes]]]:
+    """Wrap a rejected record in a dead-letter envelope.
+
+    Args:
+        record: Consumer record (``topic``, ``partition``, ``offset``,
+            ``timestamp``, ``key``, ``value`` and ``headers`` attributes).
+        error_type: Machine-readable error category.
+        detail: Human-readable error message.
+        field: Offending field, if the error is field-specific.
+        consumer_group: Group of the loader that rejected the record.
+
+    Returns:
+        Tuple of (JSON envelope bytes, record headers).
+    """
+    attempt = record_attempt(record.headers) + 1
+    envelope: Dict[str, Any] = {
+        "source_topic": record.topic,
+        "partition": record.partition,
+        "offset": record.offset,
+        "timestamp": record.timestamp,
+        "key": base64.b64encode(record.key).decode("ascii") if record.key is not None else None,
+        "payload": (
+            base64.b64encode(record.value).decode("ascii") if record.value is not None else None
+        ),
+        "error_type": error_type,
+        "error": detail,
+        "field": field,
+        "consumer_group": consumer_group,
+        "attempt": attempt,
+        "failed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    headers = [
+        (HEADER_ERROR_TYPE, error_type.encode("utf-8")),
+        (HEADER_SOURCE_TOPIC, record.topic.encode("utf-8")),
+        (HEADER_ATTEMPT, str(attempt).encode("ascii")),
+    ]
+    return json.dumps(envelope).encode("utf-8"), headers
+
+
+def _decode_b64(value: Optional[str]) -> Optional[bytes]:
+    return base64.b64decode(value) if value is not None else None
+
+
+@dataclass
+class ReplayStats:
+    """Counters from a DLQ replay run."""
+
+    replayed: int = 0
+    skipped: int = 0
+    unreadable: int = 0
+
+
+def _caught_up(consumer: Any) -> bool:
+    """Return True once the consumer holds partitions and has read them to the end."""
+    partitions = consumer.assignment()
+    if not partitions:
+        return False
+    end_offsets = consumer.end_offsets(list(partitions))
+    return all(consumer.position(tp) >= end for tp, end in end_offsets.items())
+
+
+def replay_dead_letters(
+    consumer: Any,
+    producer: Any,
+    error_type: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+    max_messages: Optional[int] = None,
+    poll_timeout_ms: int = 1000,
+    idle_timeout_ms: int = 30_000,
+    dry_run: bool = False,
+    clock: Callable[[], float] = time.monotonic,
+    send_timeout: float = 60.0,
+) -> ReplayStats:
+    """Re-publish dead-lettered payloads to their source topics.
+
+    Reads the DLQ topics ``consumer`` is subscribed to until its positions
+    reach the end offsets of its assigned partitions. Empty polls alone do not
+    end the replay: a fresh group often gets none while it is still joining
+    (``group.initial.rebalance.delay.ms``). Offsets are committed once every
+    send of the batch is acknowledged, so a crash replays at most the last
+    batch twice and a failed send raises before its offset is committed.
+    Records filtered out are skipped for this consumer group; use a fresh group
+    to rescan them.
+
+    Args:
+        consumer: Consumer subscribed to one or more ``*.dlq`` topics.
+        producer: Producer used to re-publish payloads.
+        error_type: Only replay records with this error type.
+        max_attempts: Skip records that were already dead-lettered this often.
+        max_messages: Stop after replaying this many records.
+        poll_timeout_ms: Timeout of each poll.
+        idle_timeout_ms: Give up when no record arrives for this long without
+            the end offsets being reached (e.g. no partitions get assigned).
+        dry_run: Count what would be replayed without producing or committing.
+        clock: Time source in seconds.
+        send_timeout: Seconds to wait for each re-published record.
+
+    Returns:
+        :class:`ReplayStats` for the run.
+    """
+    stats = ReplayStats()
+    idle_since = clock()
+    while max_messages is None or stats.replayed < max_messages:
+        # Cap the poll so committing it never skips records beyond max_messages
+        remaining = None if max_messages is None else max_messages - stats.replayed
+        batches = consumer.poll(timeout_ms=poll_timeout_ms, max_records=remaining)
+        if not batches:
+            if _caught_up(consumer):
+                break
+            if (clock() - idle_since) * 1000 >= idle_timeout_ms:
+                logger.warning(
+                    "DLQ replay stopped after %d ms without records before reaching the end "
+                    "(assigned partitions: %s)",
+                    idle_timeout_ms,
+                    sorted(consumer.assignment()),
+                )
+                break
+            continue
+        idle_since = clock()
+
+        futures = []
+        for records in batches.values():
+            for record in records:
+                try:
+                    envelope = json.loads(record.value)
+                    source_topic = envelope["source_topic"]
+                except (TypeError, ValueError, KeyError):
+                    stats.unreadable += 1
+                    continue
+
+                if (error_type is not None and envelope.get("error_type") != error_type) or (
+                    max_attempts is not None and envelope.get("attempt", 0) >= max_attempts
+                ):
+                    stats.skipped += 1
+                    continue
+
+                if not dry_run:
+                    future = producer.send(
+                        source_topic,
+                        value=_decode_b64(envelope.get("payload")),
+                        key=_decode_b64(envelope.get("key")),
+                        headers=[(HEADER_ATTEMPT, str(envelope.get("attempt", 1)).encode("ascii"))],
+                    )
+                    futures.append(future)
+                stats.replayed += 1
+
+        if dry_run:
+            continue
+        producer.flush()
+        wait_for_delivery(futures, send_timeout)
+        consumer.commit()
+
+    logger.info(
+        "DLQ replay finished: %d replayed, %d skipped, %d unreadable",
+        stats.replayed,
+        stats.skipped,
+        stats.unreadable,
+    )
+    return stats
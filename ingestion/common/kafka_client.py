@@ -0,0 +1,71 @@
+"""
+Kafka client factories for Oracul ingestion services.
+
+Producers and consumers exchange raw bytes. Decoding happens in the loaders,
+so a malformed payload surfaces as a validation error for one record instead
+of an exception inside ``poll()`` that takes down the whole batch.
+"""
+
+import os
+from typing import Any, Iterable
+
+from kafka import KafkaConsumer, KafkaProducer
+
+DEFAULT_BOOTSTRAP_SERVERS = "localhost:9092"
+DEFAULT_GROUP_ID = "oracul-loaders"
+
+
+def bootstrap_servers() -> str:
+    """Return the broker list from the environment (see ``config/base/kafka.yml``)."""
+    return os.getenv("KAFKA_BOOTSTRAP_SERVERS", DEFAULT_BOOTSTRAP_SERVERS)
+
+
+def create_producer(**overrides: Any) -> KafkaProducer:
+    """Create a bytes producer with the platform's durability and batching defaults.
+
+    Args:
+        **overrides: Any ``KafkaProducer`` setting to override.
+
+    Returns:
+        Configured ``KafkaProducer``.
+    """
+    settings = {
+        "bootstrap_servers": bootstrap_servers(),
+        "acks": "all",
+        "compression_type": "snappy",
+        "linger_ms": 100,
+        "batch_size": 16384,
+        "retries": 5,
+        "retry_backoff_ms": 1000,
+        "request_timeout_ms": 30000,
+        "max_block_ms": 60000,
+    }
+    settings.update(overrides)
+    return KafkaProducer(**settings)
+
+
+def create_consumer(
+    topics: Iterable[str], group_id: str = DEFAULT_GROUP_ID, **overrides: Any
+) -> KafkaConsumer:
+    """Create a bytes consumer with manual offset commits.
+
+    Args:
+        topics: Topics to subscribe to.
+        group_id: Consumer group ID.
+        **overrides: Any ``KafkaConsumer`` setting to override.
+
+    Returns:
+        Configured ``KafkaConsumer``.
+    """
+    settings = {
+        "bootstrap_servers": bootstrap_servers(),
+        "group_id": group_id,
+        "auto_offset_reset": "earliest",
+        "enable_auto_commit": False,
+        "max_poll_records": 500,
+        "max_poll_interval_ms": 300000,
+        "session_timeout_ms": 10000,
+        "heartbeat_interval_ms": 3000,
+    }
+    settings.update(overrides)
+    return KafkaConsumer(*topics, **settings)
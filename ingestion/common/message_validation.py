@@ -0,0 +1,215 @@
+"""
+Batch validation of raw Kafka messages.
+
+Messages are decoded and checked a whole poll batch at a time: the batch is
+JSON-decoded in one pass (falling back to per-message decoding only when that
+pass fails), then each schema field is checked as a column over the rows that
+are still valid. The result splits the batch into rows ready for a single bulk
+insert and per-message errors destined for the dead-letter queue.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_MISSING = object()
+
+_HEX_RE = re.compile(r"0x[0-9a-fA-F]*")
+_HASH_RE = re.compile(r"0x[0-9a-fA-F]{64}")
+_ADDRESS_RE = re.compile(r"0x[0-9a-fA-F]{40}")
+
+# Error types recorded in dead letters
+DECODE_ERROR = "decode_error"
+NOT_AN_OBJECT = "not_an_object"
+MISSING_FIELD = "missing_field"
+INVALID_FIELD = "invalid_field"
+
+
+def is_uint(value: Any) -> bool:
+    """Return True for non-negative integers (booleans excluded)."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def is_hash(value: Any) -> bool:
+    """Return True for 0x-prefixed 32-byte hex strings."""
+    return isinstance(value, str) and _HASH_RE.fullmatch(value) is not None
+
+
+def is_address(value: Any) -> bool:
+    """Return True for 0x-prefixed 20-byte hex strings."""
+    return isinstance(value, str) and _ADDRESS_RE.fullmatch(value) is not None
+
+
+def is_hex(value: Any) -> bool:
+    """Return True for 0x-prefixed hex strings of any length."""
+    return isinstance(value, str) and _HEX_RE.fullmatch(value) is not None
+
+
+def is_topic_list(value: Any) -> bool:
+    """Return True for a list of at most four 32-byte hex topics."""
+    return isinstance(value, list) and len(value) <= 4 and all(is_hash(t) for t in value)
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """Validation rule for a single message field."""
+
+    name: str
+    check: Callable[[Any], bool]
+    required: bool = True
+
+
+@dataclass(frozen=True)
+class MessageSchema:
+    """Expected shape of a raw topic's messages and the table they load into."""
+
+    name: str
+    table: str
+    fields: Tuple[FieldRule, ...]
+
+    @property
+    def columns(self) -> List[str]:
+        """Return the column names inserted into ``table``."""
+        return [rule.name for rule in self.fields]
+
+
+BLOCK_SCHEMA = MessageSchema(
+    name="block",
+    table="raw_blocks",
+    fields=(
+        FieldRule("number", is_uint),
+        FieldRule("hash", is_hash),
+        FieldRule("parent_hash", is_hash),
+        FieldRule("timestamp", is_uint),
+        FieldRule("miner", is_address, required=False),
+        FieldRule("gas_used", is_uint, required=False),
+        FieldRule("gas_limit", is_uint, required=False),
+        FieldRule("base_fee_per_gas", is_uint, required=False),
+        FieldRule("transaction_count", is_uint, required=False),
+    ),
+)
+
+LOG_SCHEMA = MessageSchema(
+    name="log",
+    table="raw_logs",
+    fields=(
+        FieldRule("block_number", is_uint),
+        FieldRule("block_hash", is_hash, required=False),
+        FieldRule("transaction_hash", is_hash),
+        FieldRule("log_index", is_uint),
+        FieldRule("address", is_address),
+        FieldRule("topics", is_topic_list),
+        FieldRule("data", is_hex),
+    ),
+)
+
+# Raw topic -> schema, matching ``kafka.topics`` in config/base/kafka.yml
+DEFAULT_SCHEMAS: Dict[str, MessageSchema] = {
+    "eth.blocks.raw": BLOCK_SCHEMA,
+    "eth.logs.raw": LOG_SCHEMA,
+}
+
+
+@dataclass
+class ValidationError:
+    """Why a single message in a batch was rejected."""
+
+    position: int
+    error_type: str
+    detail: str
+    field: Optional[str] = None
+
+
+@dataclass
+class BatchValidation:
+    """Outcome of validating one batch against a schema.
+
+    Attributes:
+        rows: Valid messages projected onto the schema columns, in batch order.
+        valid_positions: Batch position of each entry in ``rows``.
+        errors: One entry per rejected message, in batch order.
+    """
+
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    valid_positions: List[int] = field(default_factory=list)
+    errors: List[ValidationError] = field(default_factory=list)
+
+
+def decode_batch(values: Sequence[Optional[bytes]]) -> Tuple[List[Any], Dict[int, str]]:
+    """JSON-decode a batch of raw payloads.
+
+    Args:
+        values: Raw message values; ``None`` for tombstones.
+
+    Returns:
+        Tuple of (decoded values, {position: error detail}). Undecodable
+        positions hold ``None`` in the decoded list.
+    """
+    try:
+        return [json.loads(v) for v in values], {}
+    except (TypeError, ValueError):
+        pass
+
+    decoded: List[Any] = []
+    errors: Dict[int, str] = {}
+    for position, value in enumerate(values):
+        try:
+            decoded.append(json.loads(value))
+        except (TypeError, ValueError) as exc:
+            decoded.append(None)
+            errors[position] = f"{type(exc).__name__}: {exc}"
+    return decoded, errors
+
+
+def validate_batch(values: Sequence[Optional[bytes]], schema: MessageSchema) -> BatchValidation:
+    """Validate a batch of raw payloads column by column.
+
+    Args:
+        values: Raw message values in batch order.
+        schema: Schema every message must satisfy.
+
+    Returns:
+        :class:`BatchValidation` splitting the batch into rows and errors.
+    """
+    decoded, decode_errors = decode_batch(values)
+    errors = [ValidationError(p, DECODE_ERROR, d) for p, d in decode_errors.items()]
+
+    valid = [p for p in range(len(decoded)) if p not in decode_errors]
+    not_objects = [p for p in valid if not isinstance(decoded[p], dict)]
+    if not_objects:
+        errors.extend(
+            ValidationError(
+                p, NOT_AN_OBJECT, f"expected JSON object, got {type(decoded[p]).__name__}"
+            )
+            for p in not_objects
+        )
+        valid = [p for p in valid if isinstance(decoded[p], dict)]
+
+    for rule in schema.fields:
+        column = [decoded[p].get(rule.name, _MISSING) for p in valid]
+        failed = set()
+        for position, value in zip(valid, column):
+            if value is _MISSING or value is None:
+                if rule.required:
+                    errors.append(
+                        ValidationError(position, MISSING_FIELD, f"missing {rule.name}", rule.name)
+                    )
+                    failed.add(position)
+            elif not rule.check(value):
+                errors.append(
+                    ValidationError(
+                        position, INVALID_FIELD, f"invalid {rule.name}: {value!r:.80}", rule.name
+                    )
+                )
+                failed.add(position)
+        if failed:
+            valid = [p for p in valid if p not in failed]
+
+    errors.sort(key=lambda e: e.position)
+    columns = schema.columns
+    return BatchValidation(
+        rows=[{c: decoded[p].get(c) for c in columns} for p in valid],
+        valid_positions=valid,
+        errors=errors,
+    )
@@ -0,0 +1,215 @@
+"""
+Raw topic loader: Kafka -> ClickHouse with dead-letter isolation.
+
+Each poll batch is validated as a whole. Valid rows of a topic are written with
+one bulk insert; rejected records are published to that topic's ``.dlq`` topic
+with error metadata. Offsets are committed only after both have succeeded (dead
+letters acknowledged by the broker, rows inserted), so a poison message never
+blocks or drops the rest of its batch.
+
+Delivery is at-least-once. A failing insert leaves the whole batch to be
+redelivered, including topics whose rows were already written and whose dead
+letters were already published. Each insert carries an
+``insert_deduplication_token`` built from its topic, partitions and offset
+range, so ClickHouse drops a retried insert of the same records; a redelivery
+that splits the records into different batches is not caught by that, and the
+DLQ can hold the same envelope twice. Downstream readers must therefore
+deduplicate on natural keys (block number/hash, transaction hash + log index).
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Protocol
+
+from ingestion.common.dlq import build_dead_letter, dlq_topic, wait_for_delivery
+from ingestion.common.message_validation import DEFAULT_SCHEMAS, MessageSchema, validate_batch
+
+logger = logging.getLogger(__name__)
+
+
+class RowSink(Protocol):
+    """Destination for validated rows."""
+
+    def insert(
+        self,
+        table: str,
+        columns: List[str],
+        rows: List[Dict[str, Any]],
+        dedup_token: Optional[str] = None,
+    ) -> None:
+        """Write ``rows`` to ``table`` in one bulk operation.
+
+        A retried insert with the same ``dedup_token`` should be a no-op.
+        """
+
+
+class ClickHouseSink:
+    """Row sink backed by a ``clickhouse_driver.Client``."""
+
+    def __init__(self, client: Any):
+        """Initialise the sink.
+
+        Args:
+            client: Connected ``clickhouse_driver.Client``.
+        """
+        self.client = client
+
+    def insert(
+        self,
+        table: str,
+        columns: List[str],
+        rows: List[Dict[str, Any]],
+        dedup_token: Optional[str] = None,
+    ) -> None:
+        """Insert rows with a single native-protocol INSERT.
+
+        Deduplication by token needs a replicated table, or
+        ``non_replicated_deduplication_window`` set on a plain MergeTree.
+        """
+        settings = {"insert_deduplication_token": dedup_token} if dedup_token else None
+        self.client.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES", rows, settings=settings
+        )
+
+
+def batch_dedup_token(topic: str, records: List[Any]) -> str:
+    """Return a deterministic insert token for the records of one topic."""
+    ranges: Dict[int, List[int]] = {}
+    for record in records:
+        low, high = ranges.setdefault(record.partition, [record.offset, record.offset])
+        ranges[record.partition] = [min(low, record.offset), max(high, record.offset)]
+    parts = ",".join(f"{p}:{low}-{high}" for p, (low, high) in sorted(ranges.items()))
+    return f"{topic}/{parts}"
+
+
+@dataclass
+class BatchResult:
+    """Counters for one processed batch."""
+
+    consumed: int = 0
+    inserted: Dict[str, int] = field(default_factory=dict)
+    dead_lettered: Dict[str, int] = field(default_factory=dict)
+
+
+class RawTopicLoader:
+    """Consume raw topics, bulk-load valid rows and dead-letter the rest."""
+
+    def __init__(
+        self,
+        consumer: Any,
+        producer: Any,
+        sink: RowSink,
+        schemas: Optional[Mapping[str, MessageSchema]] = None,
+        consumer_group: Optional[str] = None,
+        max_records: int = 500,
+        poll_timeout_ms: int = 1000,
+        send_timeout: float = 60.0,
+    ):
+        """Initialise the loader.
+
+        Args:
+            consumer: Bytes consumer subscribed to the raw topics, with
+                auto-commit disabled.
+            producer: Bytes producer used for dead letters.
+            sink: Destination for validated rows.
+            schemas: Topic -> schema mapping (defaults to ``DEFAULT_SCHEMAS``).
+            consumer_group: Group ID recorded in dead letters.
+            max_records: Maximum records per poll batch.
+            poll_timeout_ms: Poll timeout in milliseconds.
+            send_timeout: Seconds to wait for each dead letter to be acknowledged.
+        """
+        self.consumer = consumer
+        self.producer = producer
+        self.sink = sink
+        self.schemas = dict(schemas or DEFAULT_SCHEMAS)
+        self.consumer_group = consumer_group
+        self.max_records = max_records
+        self.poll_timeout_ms = poll_timeout_ms
+        self.send_timeout = send_timeout
+
+    def process(self, records: List[Any]) -> BatchResult:
+        """Validate, dead-letter and bulk-insert one batch of records.
+
+        Args:
+            records: Consumer records from a single poll.
+
+        Returns:
+            :class:`BatchResult` for the batch.
+
+        Raises:
+            ValueError: If a record comes from a topic without a schema.
+            Exception: If a dead letter was not delivered or an insert failed.
+        """
+        result = BatchResult(consumed=len(records))
+        by_topic: Dict[str, List[Any]] = defaultdict(list)
+        for record in records:
+            by_topic[record.topic].append(record)
+
+        pending_inserts = []
+        dead_letters = []
+        for topic, topic_records in by_topic.items():
+            schema = self.schemas.get(topic)
+            if schema is None:
+                raise ValueError(f"No message schema registered for topic '{topic}'")
+
+            validation = validate_batch([r.value for r in topic_records], schema)
+            for error in validation.errors:
+                value, headers = build_dead_letter(
+                    topic_records[error.position],
+                    error.error_type,
+                    error.detail,
+                    field=error.field,
+                    consumer_group=self.consumer_group,
+                )
+                future = self.producer.send(
+                    dlq_topic(topic),
+                    value=value,
+                    key=topic_records[error.position].key,
+                    headers=headers,
+                )
+                dead_letters.append(future)
+            if validation.errors:
+                result.dead_lettered[topic] = len(validation.errors)
+                logger.warning(
+                    "Dead-lettered %d of %d records from %s",
+                    len(validation.errors),
+                    len(topic_records),
+                    topic,
+                )
+            if validation.rows:
+                pending_inserts.append(
+                    (schema, validation.rows, batch_dedup_token(topic, topic_records))
+                )
+
+        # Dead letters must be durable before the offsets that skip them are committed
+        if dead_letters:
+            self.producer.flush()
+            wait_for_delivery(dead_letters, self.send_timeout)
+
+        for schema, rows, token in pending_inserts:
+            self.sink.insert(schema.table, schema.columns, rows, dedup_token=token)
+            result.inserted[schema.table] = len(rows)
+        return result
+
+    def poll_once(self) -> Optional[BatchResult]:
+        """Poll one batch, process it and commit its offsets.
+
+        Returns:
+            :class:`BatchResult`, or None if the poll returned nothing.
+        """
+        batches = self.consumer.poll(timeout_ms=self.poll_timeout_ms, max_records=self.max_records)
+        records = [record for partition in batches.values() for record in partition]
+        if not records:
+            return None
+
+        result = self.process(records)
+        self.consumer.commit()
+        return result
+
+    def run(self, max_batches: Optional[int] = None) -> None:
+        """Process batches until ``max_batches`` is reached (forever if None)."""
+        processed = 0
+        while max_batches is None or processed < max_batches:
+            if self.poll_once() is not None:
+                processed += 1
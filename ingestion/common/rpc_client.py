@@ -0,0 +1,75 @@
+"""
+Minimal Ethereum JSON-RPC client.
+
+Tracks the number of calls and response bytes so scanners can report their
+RPC budget usage.
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import requests
+
+
+class RpcError(Exception):
+    """JSON-RPC error response."""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        """Initialise the error from the response ``error`` object."""
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+@dataclass
+class RpcStats:
+    """Counters for RPC budget reporting."""
+
+    calls: int = 0
+    bytes_received: int = 0
+
+
+class JsonRpcClient:
+    """Blocking JSON-RPC client over HTTP."""
+
+    def __init__(
+        self, url: str, timeout_seconds: float = 30, session: Optional[requests.Session] = None
+    ):
+        """Initialise the client.
+
+        Args:
+            url: RPC endpoint URL (e.g. ``ALCHEMY_ETH_MAINNET_URL``).
+            timeout_seconds: Per-request timeout.
+            session: Optional shared ``requests.Session``.
+        """
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.session = session or requests.Session()
+        self.stats = RpcStats()
+        self._ids = itertools.count(1)
+
+    def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """Call a JSON-RPC method and return its ``result``.
+
+        Raises:
+            RpcError: If the node returns an error object.
+            requests.HTTPError: On non-2xx HTTP responses.
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params or [],
+        }
+        response = self.session.post(self.url, json=payload, timeout=self.timeout_seconds)
+        response.raise_for_status()
+
+        self.stats.calls += 1
+        self.stats.bytes_received += len(response.content)
+        body = response.json()
+        if "error" in body:
+            error = body["error"]
+            raise RpcError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return body["result"]
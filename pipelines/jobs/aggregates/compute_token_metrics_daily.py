@@ -0,0 +1,181 @@
+"""
+Compute daily ERC-20 token metrics from raw logs.
+
+Daily job behind the token metrics DAG. It decodes Transfer logs from
+``raw_logs`` into ``erc20_transfers`` rows, dates them with ``raw_blocks``
+timestamps and aggregates them per token and UTC day into the
+``token_metrics_daily`` features read by the anomaly detectors.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+GROUP_COLUMNS = ["token_address", "date"]
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:]
+
+
+def _amount(data: str) -> float:
+    # Raw token units; float64 keeps 18-decimal amounts within range
+    return float(int(data[:66], 16)) if len(data) > 2 else 0.0
+
+
+def canonical_blocks(blocks: pd.DataFrame) -> pd.DataFrame:
+    """Reduce ``raw_blocks`` rows to one row per block number.
+
+    The raw tables are loaded at-least-once and keep both sides of a reorg.
+    Repeated rows of the same block collapse to the last one loaded. When a
+    number has several hashes, the block whose hash the next block names as
+    its ``parent_hash`` wins (walking down from the highest contested
+    number); without that evidence the last one loaded wins.
+
+    Args:
+        blocks: ``raw_blocks`` rows with ``number`` and, when available,
+            ``hash`` and ``parent_hash``, in load order.
+
+    Returns:
+        One row per block number.
+    """
+    if not {"hash", "parent_hash"} <= set(blocks.columns):
+        return blocks.drop_duplicates("number", keep="last")
+
+    blocks = blocks.drop_duplicates("hash", keep="last")
+    contested = blocks["number"].duplicated(keep=False).to_numpy()
+    if not contested.any():
+        return blocks
+
+    numbers = blocks["number"].to_numpy()
+    hashes = blocks["hash"].to_numpy()
+    parents = blocks["parent_hash"].to_numpy()
+    parent_of = dict(zip(numbers[~contested], parents[~contested]))
+    candidates = pd.Series(np.flatnonzero(contested)).groupby(numbers[contested]).agg(list)
+
+    keep = ~contested
+    for number in sorted(candidates.index, reverse=True):
+        rows = candidates[number]
+        expected = parent_of.get(number + 1)
+        chosen = next((r for r in reversed(rows) if hashes[r] == expected), rows[-1])
+        keep[chosen] = True
+        parent_of[number] = parents[chosen]
+    logger.warning("Resolved %d block numbers with several hashes", len(candidates))
+    return blocks[keep]
+
+
+def decode_transfers(logs: pd.DataFrame, blocks: pd.DataFrame) -> pd.DataFrame:
+    """Decode ERC-20 Transfer logs into ``erc20_transfers`` rows.
+
+    ERC-721 transfers share the topic but index the token ID as a fourth
+    topic; they are dropped. Logs whose block is not in ``blocks`` cannot be
+    dated and are dropped with a warning.
+
+    The raw tables are loaded at-least-once, so blocks are first resolved to
+    one canonical row per number (:func:`canonical_blocks`), logs tagged with
+    a ``block_hash`` of another (orphaned) block are dropped, and repeated
+    logs are deduplicated on ``(transaction_hash, log_index)``.
+
+    Args:
+        logs: ``raw_logs`` rows (``block_number``, ``transaction_hash``,
+            ``log_index``, ``address``, ``topics``, ``data`` and optionally
+            ``block_hash``).
+        blocks: ``raw_blocks`` rows with ``number`` and ``timestamp`` (unix
+            seconds), and optionally ``hash`` and ``parent_hash``.
+
+    Returns:
+        DataFrame with ``token_address``, ``block_number``, ``log_index``,
+        ``transaction_hash``, ``from_address``, ``to_address``, ``amount`` and
+        ``ts`` (UTC).
+    """
+    blocks = canonical_blocks(blocks).set_index("number")
+    if "block_hash" in logs.columns and "hash" in blocks.columns:
+        canonical_hash = logs["block_number"].map(blocks["hash"])
+        orphaned = (
+            logs["block_hash"].notna()
+            & canonical_hash.notna()
+            & (logs["block_hash"] != canonical_hash)
+        )
+        if orphaned.any():
+            logger.warning("Dropping %d logs from orphaned blocks", int(orphaned.sum()))
+            logs = logs[~orphaned]
+    logs = logs.drop_duplicates(["transaction_hash", "log_index"], keep="last")
+
+    is_transfer = np.fromiter(
+        (len(t) == 3 and t[0] == TRANSFER_TOPIC for t in logs["topics"]),
+        dtype=bool,
+        count=len(logs),
+    )
+    transfers = logs[is_transfer]
+    topics = transfers["topics"].tolist()
+
+    frame = pd.DataFrame(
+        {
+            "token_address": transfers["address"].to_numpy(),
+            "block_number": transfers["block_number"].to_numpy(),
+            "log_index": transfers["log_index"].to_numpy(),
+            "transaction_hash": transfers["transaction_hash"].to_numpy(),
+            "from_address": [_topic_address(t[1]) for t in topics],
+            "to_address": [_topic_address(t[2]) for t in topics],
+            "amount": np.fromiter(
+                (_amount(d) for d in transfers["data"]), dtype=np.float64, count=len(transfers)
+            ),
+        }
+    )
+    timestamps = frame["block_number"].map(blocks["timestamp"])
+    undated = timestamps.isna()
+    if undated.any():
+        logger.warning("Dropping %d transfers from blocks not yet loaded", int(undated.sum()))
+        frame, timestamps = frame[~undated], timestamps[~undated]
+    frame["ts"] = pd.to_datetime(timestamps.astype(np.int64), unit="s", utc=True)
+    return frame.reset_index(drop=True)
+
+
+def compute_token_metrics_daily(
+    transfers: pd.DataFrame, prices: Optional[pd.DataFrame] = None, chain: str = "eth_mainnet"
+) -> pd.DataFrame:
+    """Aggregate transfers into per-token daily metrics.
+
+    Args:
+        transfers: Rows from :func:`decode_transfers`.
+        prices: Optional daily closes with ``token_address``, ``date`` and
+            ``price``; without them ``price_change`` is 0.
+        chain: Chain name stored with each row.
+
+    Returns:
+        ``token_metrics_daily`` rows: ``chain``, ``token_address``, ``date``,
+        ``volume``, ``tx_count``, ``unique_addresses`` and ``price_change``.
+    """
+    frame = transfers.assign(date=transfers["ts"].dt.date)
+    metrics = frame.groupby(GROUP_COLUMNS, sort=True).agg(
+        volume=("amount", "sum"), tx_count=("transaction_hash", "nunique")
+    )
+
+    counterparties = pd.concat(
+        [
+            frame[GROUP_COLUMNS + [column]].rename(columns={column: "address"})
+            for column in ("from_address", "to_address")
+        ]
+    )
+    metrics["unique_addresses"] = counterparties.groupby(GROUP_COLUMNS)["address"].nunique()
+
+    if prices is None:
+        metrics["price_change"] = 0.0
+    else:
+        closes = prices.sort_values(GROUP_COLUMNS)
+        changes = closes.groupby("token_address")["price"].pct_change()
+        metrics["price_change"] = (
+            changes.set_axis(pd.MultiIndex.from_frame(closes[GROUP_COLUMNS]))
+            .reindex(metrics.index)
+            .fillna(0.0)
+        )
+
+    metrics = metrics.reset_index()
+    metrics.insert(0, "chain", chain)
+    return metrics
@@ -0,0 +1,61 @@
+"""
+Publish the token leaderboard snapshot served by the API.
+
+Last task of the daily DAGs: once token metrics and anomaly detection have run
+for ``run_date``, build the snapshot from the sparkline window of
+``token_metrics_daily``, that day's ``anomalies`` and the daily closes from
+``prices_spot`` (for USD volume), and publish it to the
+snapshot directory shared with the API, which swaps it in without a restart.
+"""
+
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+import yaml
+
+from pipelines.libs.token_snapshot import publish_token_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = Path("/opt/airflow/snapshots/token_leaderboard")
+DEFAULT_TOKENS_CONFIG = Path("/config/base/tokens.yml")
+
+
+def publish_daily_token_snapshot(
+    metrics: pd.DataFrame,
+    anomalies: pd.DataFrame,
+    run_date: date,
+    snapshot_dir: Union[str, Path] = DEFAULT_SNAPSHOT_DIR,
+    tokens_config: Union[str, Path] = DEFAULT_TOKENS_CONFIG,
+    sparkline_days: int = 30,
+    keep: int = 3,
+    prices: Optional[pd.DataFrame] = None,
+) -> Path:
+    """Publish the snapshot for ``run_date`` covering all tracked tokens.
+
+    Args:
+        metrics: ``token_metrics_daily`` rows for at least the last
+            ``sparkline_days`` days up to ``run_date``.
+        anomalies: ``anomalies`` rows for ``run_date`` (token entities).
+        run_date: Day the DAG run covers.
+        snapshot_dir: Directory the API reads snapshots from.
+        tokens_config: Path to ``tokens.yml``.
+        sparkline_days: Days of volume history per token.
+        keep: Number of snapshot files kept.
+        prices: Daily USD closes (``token_address``, ``date``, ``price``) up
+            to ``run_date``; tokens without one are not ranked by volume.
+
+    Returns:
+        Path of the published snapshot.
+    """
+    with open(tokens_config) as f:
+        tokens = yaml.safe_load(f)["tokens"]["tracked_tokens"]
+
+    path = publish_token_snapshot(
+        metrics, anomalies, run_date, snapshot_dir, tokens, sparkline_days, keep, prices
+    )
+    logger.info("Token snapshot for %s published to %s", run_date, path)
+    return path
@@ -0,0 +1,76 @@
+"""
+Detect multivariate token anomalies with a cached Isolation Forest model.
+
+Daily job behind the anomaly detection DAG. It reuses the latest model from the
+model store, refits only tokens whose metrics drifted, and scores the run date
+for every token in one vectorized pass.
+"""
+
+import logging
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from pipelines.libs.iforest_utils import (
+    DATE_COLUMN,
+    TOKEN_COLUMN,
+    IForestConfig,
+    ModelStore,
+    refresh_model,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = Path("/opt/airflow/models/token_iforest")
+
+
+def detect_token_multivariate_anomalies(
+    metrics: pd.DataFrame,
+    run_date: date,
+    model_dir: Union[str, Path] = DEFAULT_MODEL_DIR,
+    config: Optional[IForestConfig] = None,
+    keep_versions: int = 5,
+) -> pd.DataFrame:
+    """Score ``run_date`` for every token and return the flagged rows.
+
+    Args:
+        metrics: Rows from ``token_metrics_daily`` with ``token_address``,
+            ``date`` and the feature columns, covering the training history
+            up to and including ``run_date``.
+        run_date: Day to score.
+        model_dir: Root of the versioned model store.
+        config: Detector configuration.
+        keep_versions: Number of model versions kept on disk.
+
+    Returns:
+        DataFrame of anomalous token-days shaped for the ``anomalies`` table
+        (``entity_type``, ``entity_id``, ``ts``, ``score``, ``detector``,
+        ``model_version``).
+    """
+    config = config or IForestConfig()
+    dates = pd.to_datetime(metrics[DATE_COLUMN]).dt.date
+
+    before_run = dates < run_date
+    recent_start = run_date - timedelta(days=config.drift_window_days)
+    history = metrics[before_run]
+    recent = metrics[before_run & (dates >= recent_start)]
+    day = metrics[dates == run_date]
+
+    store = ModelStore(model_dir, keep_versions=keep_versions)
+    model, status = refresh_model(store, history, recent, config)
+    logger.info("Using iforest model v%s (%s) for %s", model.version, status, run_date)
+
+    scored = model.score(day)
+    flagged = scored[scored["is_anomaly"]]
+    return pd.DataFrame(
+        {
+            "entity_type": "token",
+            "entity_id": flagged[TOKEN_COLUMN].to_numpy(),
+            "ts": pd.Timestamp(run_date),
+            "score": flagged["anomaly_score"].to_numpy(),
+            "detector": "iforest_multivariate",
+            "model_version": model.version,
+        }
+    )
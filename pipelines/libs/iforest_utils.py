@@ -0,0 +1,531 @@
+"""
+Multivariate Isolation Forest detector for daily token metrics.
+
+Scores each token-day jointly on volume, transaction count, unique addresses
+and price change. Tokens live on very different scales, so every token keeps a
+small baseline profile (per-feature median and robust scale of its history) and
+its features are normalised against that profile before reaching one shared
+IsolationForest. The per-token state is a handful of floats, a whole day is
+scored with a single ``decision_function`` call, and tokens whose behaviour
+drifts can be refitted without touching the others.
+
+Fitted models are persisted as versioned directories under a model root:
+
+    <root>/v0001/manifest.json   # version, features, sklearn version, config
+    <root>/v0001/profiles.npz    # token ids + float32 medians/scales
+    <root>/v0001/forest.joblib   # compressed IsolationForest
+"""
+
+import json
+import logging
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import IsolationForest
+
+logger = logging.getLogger(__name__)
+
+TOKEN_COLUMN = "token_address"
+DATE_COLUMN = "date"
+FEATURE_COLUMNS = ("volume", "tx_count", "unique_addresses", "price_change")
+# Heavy-tailed counts and volumes are compared on a log scale
+LOG_FEATURES = ("volume", "tx_count", "unique_addresses")
+
+MANIFEST_FILE = "manifest.json"
+PROFILES_FILE = "profiles.npz"
+FOREST_FILE = "forest.joblib"
+
+# IQR of a standard normal; turns an IQR into a sigma-comparable scale
+_IQR_TO_SIGMA = 1.349
+
+
+@dataclass(frozen=True)
+class IForestConfig:
+    """Training and drift settings for the multivariate detector."""
+
+    n_estimators: int = 100
+    max_samples: int = 256
+    # Expected share of anomalous token-days; sets the decision threshold
+    contamination: float = 0.01
+    # Training rows sampled to place that threshold (sklearn scores all of them)
+    threshold_sample_size: int = 50_000
+    random_state: int = 42
+    # Tokens with fewer days of history get no profile and are not scored
+    min_history_days: int = 14
+    # Lower bound on per-feature scale so flat series (stablecoins) stay finite
+    min_scale: float = 0.05
+    # Drift: median normalised value over the recent window, in sigma units
+    drift_window_days: int = 7
+    drift_threshold: float = 2.0
+    # Drifted tokens are refitted on their last days only, so the new profile
+    # describes the new regime instead of being dragged back by older history
+    refit_window_days: int = 7
+    # Refit the shared forest when more than this share of tokens drifted
+    max_drifted_fraction: float = 0.2
+    # Parallel profile fitting
+    batch_size: int = 1000
+    workers: Optional[int] = None
+
+
+@dataclass
+class TokenProfiles:
+    """Per-token baseline used to normalise features before scoring.
+
+    Attributes:
+        tokens: Sorted array of token identifiers.
+        medians: float32 array of shape (n_tokens, n_features).
+        scales: float32 array of shape (n_tokens, n_features).
+    """
+
+    tokens: np.ndarray
+    medians: np.ndarray
+    scales: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "TokenProfiles":
+        """Return a profile set with no tokens."""
+        n_features = len(FEATURE_COLUMNS)
+        return cls(
+            tokens=np.array([], dtype=object),
+            medians=np.empty((0, n_features), dtype=np.float32),
+            scales=np.empty((0, n_features), dtype=np.float32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def lookup(self, tokens: np.ndarray) -> np.ndarray:
+        """Return the profile row index for each token, or -1 when unknown."""
+        tokens = np.asarray(tokens, dtype=object)
+        if len(self.tokens) == 0:
+            return np.full(len(tokens), -1, dtype=np.int64)
+        idx = np.searchsorted(self.tokens, tokens)
+        idx = np.clip(idx, 0, len(self.tokens) - 1)
+        found = self.tokens[idx] == tokens
+        return np.where(found, idx, -1)
+
+    def normalise(self, tokens: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalise transformed feature rows against their token profile.
+
+        Args:
+            tokens: Token identifier for each row.
+            values: Transformed feature matrix from :func:`transform_features`.
+
+        Returns:
+            Tuple of (normalised matrix, boolean mask of rows with a profile).
+            Rows without a profile are left as NaN.
+        """
+        idx = self.lookup(tokens)
+        known = idx >= 0
+        normalised = np.full(values.shape, np.nan, dtype=np.float64)
+        rows = idx[known]
+        normalised[known] = (values[known] - self.medians[rows]) / self.scales[rows]
+        return normalised, known
+
+    def merge(self, other: "TokenProfiles") -> "TokenProfiles":
+        """Return a new profile set where tokens in ``other`` replace ours."""
+        keep = ~np.isin(self.tokens, other.tokens)
+        tokens = np.concatenate([self.tokens[keep], other.tokens])
+        order = np.argsort(tokens, kind="stable")
+        return TokenProfiles(
+            tokens=tokens[order],
+            medians=np.concatenate([self.medians[keep], other.medians])[order],
+            scales=np.concatenate([self.scales[keep], other.scales])[order],
+        )
+
+
+@dataclass
+class IForestModel:
+    """Fitted token profiles plus the shared forest."""
+
+    profiles: TokenProfiles
+    forest: IsolationForest
+    config: IForestConfig = field(default_factory=IForestConfig)
+    version: Optional[int] = None
+    trained_at: Optional[str] = None
+    forest_trained_at: Optional[str] = None
+
+    def score(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Score token-day rows with a single ``decision_function`` call.
+
+        Args:
+            frame: DataFrame with the token column and all feature columns.
+
+        Returns:
+            Copy of the token/date columns with ``anomaly_score`` (sklearn
+            decision function; negative means anomalous) and ``is_anomaly``.
+            Tokens without a profile get a NaN score and ``is_anomaly=False``.
+        """
+        tokens = frame[TOKEN_COLUMN].to_numpy(dtype=object)
+        normalised, known = self.profiles.normalise(tokens, transform_features(frame))
+
+        scores = np.full(len(frame), np.nan, dtype=np.float64)
+        if known.any():
+            scores[known] = self.forest.decision_function(normalised[known])
+
+        columns = [c for c in (TOKEN_COLUMN, DATE_COLUMN) if c in frame.columns]
+        result = frame[columns].copy()
+        result["anomaly_score"] = scores
+        result["is_anomaly"] = known & (scores < 0)
+        return result
+
+
+def transform_features(frame: pd.DataFrame) -> np.ndarray:
+    """Return the float64 feature matrix used for profiling and scoring."""
+    values = frame[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float64, copy=True)
+    for i, column in enumerate(FEATURE_COLUMNS):
+        if column in LOG_FEATURES:
+            values[:, i] = np.log1p(np.clip(values[:, i], 0.0, None))
+    return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _fit_profile_batch(
+    tokens: np.ndarray, values: np.ndarray, min_history_days: int, min_scale: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fit profiles for one batch of tokens; rows must be grouped by token.
+
+    Runs inside worker processes, so it only takes and returns numpy arrays.
+    """
+    unique, starts, counts = np.unique(tokens, return_index=True, return_counts=True)
+    eligible = counts >= min_history_days
+    unique, starts, counts = unique[eligible], starts[eligible], counts[eligible]
+
+    n_features = values.shape[1]
+    medians = np.empty((len(unique), n_features), dtype=np.float32)
+    scales = np.empty((len(unique), n_features), dtype=np.float32)
+    for i, (start, count) in enumerate(zip(starts, counts)):
+        q25, q50, q75 = np.percentile(values[start : start + count], [25, 50, 75], axis=0)
+        medians[i] = q50
+        scales[i] = np.maximum((q75 - q25) / _IQR_TO_SIGMA, min_scale)
+    return unique, medians, scales
+
+
+def _token_batches(tokens: np.ndarray, batch_size: int) -> List[slice]:
+    """Split token-sorted rows into slices holding ``batch_size`` whole tokens each."""
+    _, starts = np.unique(tokens, return_index=True)
+    starts = np.sort(starts)
+    bounds = list(starts[::batch_size]) + [len(tokens)]
+    return [slice(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def fit_profiles(frame: pd.DataFrame, config: IForestConfig) -> TokenProfiles:
+    """Fit per-token profiles, batching tokens across a process pool.
+
+    Args:
+        frame: History of token-day rows.
+        config: Detector configuration.
+
+    Returns:
+        Profiles for every token with at least ``min_history_days`` rows.
+    """
+    if frame.empty:
+        return TokenProfiles.empty()
+
+    tokens = frame[TOKEN_COLUMN].to_numpy(dtype=object)
+    order = np.argsort(tokens, kind="stable")
+    tokens = tokens[order]
+    values = transform_features(frame)[order]
+    batches = _token_batches(tokens, config.batch_size)
+
+    args = [(tokens[s], values[s], config.min_history_days, config.min_scale) for s in batches]
+    if config.workers == 1 or len(batches) == 1:
+        results = [_fit_profile_batch(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=config.workers) as pool:
+            results = list(pool.map(_fit_profile_batch, *zip(*args)))
+
+    # Batches cover disjoint, ascending token ranges, so concatenation stays sorted
+    return TokenProfiles(
+        tokens=np.concatenate([r[0] for r in results]).astype(object),
+        medians=np.concatenate([r[1] for r in results]),
+        scales=np.concatenate([r[2] for r in results]),
+    )
+
+
+def fit_forest(
+    frame: pd.DataFrame, profiles: TokenProfiles, config: IForestConfig
+) -> IsolationForest:
+    """Fit the shared IsolationForest on profile-normalised history."""
+    tokens = frame[TOKEN_COLUMN].to_numpy(dtype=object)
+    normalised, known = profiles.normalise(tokens, transform_features(frame))
+    if not known.any():
+        raise ValueError("No token has enough history to fit the isolation forest")
+
+    train = normalised[known]
+    forest = IsolationForest(
+        n_estimators=config.n_estimators,
+        max_samples=min(config.max_samples, len(train)),
+        random_state=config.random_state,
+        n_jobs=config.workers,
+    )
+    forest.fit(train)
+
+    # Same threshold sklearn derives from ``contamination``, but placed on a
+    # sample instead of re-scoring every training row
+    rng = np.random.default_rng(config.random_state)
+    if len(train) > config.threshold_sample_size:
+        train = train[rng.choice(len(train), config.threshold_sample_size, replace=False)]
+    forest.offset_ = np.percentile(forest.score_samples(train), 100.0 * config.contamination)
+    # Scoring happens one day at a time; parallel dispatch would only add overhead
+    forest.set_params(n_jobs=None)
+    return forest
+
+
+def train_model(history: pd.DataFrame, config: Optional[IForestConfig] = None) -> IForestModel:
+    """Fit profiles and the shared forest from scratch.
+
+    Args:
+        history: Token-day rows used for training.
+        config: Detector configuration (defaults to :class:`IForestConfig`).
+
+    Returns:
+        Unsaved :class:`IForestModel`.
+    """
+    config = config or IForestConfig()
+    profiles = fit_profiles(history, config)
+    forest = fit_forest(history, profiles, config)
+    now = _utc_now()
+    return IForestModel(
+        profiles=profiles, forest=forest, config=config, trained_at=now, forest_trained_at=now
+    )
+
+
+def detect_drift(
+    profiles: TokenProfiles, recent: pd.DataFrame, threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Find tokens whose recent behaviour no longer matches their profile.
+
+    A token has drifted when the median of any normalised feature over the
+    recent window lies further than ``threshold`` scale units from zero.
+
+    Args:
+        profiles: Current token profiles.
+        recent: Token-day rows from the drift window.
+        threshold: Drift threshold in scale units.
+
+    Returns:
+        Tuple of (drifted tokens, tokens without a profile).
+    """
+    if recent.empty:
+        return np.array([], dtype=object), np.array([], dtype=object)
+
+    tokens = recent[TOKEN_COLUMN].to_numpy(dtype=object)
+    normalised, known = profiles.normalise(tokens, transform_features(recent))
+
+    unseen = np.unique(tokens[~known])
+    if not known.any():
+        return np.array([], dtype=object), unseen
+
+    medians = pd.DataFrame(normalised[known]).groupby(tokens[known]).median()
+    drifted = medians.index.to_numpy(dtype=object)[
+        (medians.abs().to_numpy() > threshold).any(axis=1)
+    ]
+    return drifted, unseen
+
+
+def refresh_model(
+    store: "ModelStore",
+    history: pd.DataFrame,
+    recent: pd.DataFrame,
+    config: Optional[IForestConfig] = None,
+) -> Tuple[IForestModel, str]:
+    """Reuse the latest stored model, retraining only what drifted.
+
+    New tokens get a profile from their whole history; drifted tokens are
+    refitted on their last ``refit_window_days`` days so a lasting change is
+    absorbed once instead of being reported on every run. Tokens still too
+    young (or, once drifted, too sparse) to fit are left as they are, and a
+    run that refits nothing saves no new version.
+
+    Args:
+        store: Model store holding previous versions.
+        history: Token-day rows available for training.
+        recent: Subset of ``history`` covering the drift window.
+        config: Detector configuration.
+
+    Returns:
+        Tuple of (model ready for scoring, status). Status is one of
+        ``"trained"`` (no usable model), ``"reused"`` (nothing to refit),
+        ``"profiles_refit"`` (only drifted/new tokens refitted) or
+        ``"forest_refit"`` (too many tokens drifted, forest refitted too).
+    """
+    config = config or IForestConfig()
+    model = store.load()
+    if model is None:
+        model = train_model(history, config)
+        store.save(model)
+        return model, "trained"
+
+    drifted, unseen = detect_drift(model.profiles, recent, config.drift_threshold)
+    if len(drifted) == 0 and len(unseen) == 0:
+        return model, "reused"
+
+    refit = fit_profiles(history[history[TOKEN_COLUMN].isin(unseen)], config)
+    if len(drifted):
+        window = _latest_days(
+            history[history[TOKEN_COLUMN].isin(drifted)], config.refit_window_days
+        )
+        window_config = replace(
+            config, min_history_days=min(config.min_history_days, config.refit_window_days)
+        )
+        # Tokens too sparse to refit on the window keep their previous profile
+        refit = refit.merge(fit_profiles(window, window_config))
+    if len(refit) == 0:
+        logger.info(
+            "Reusing iforest model: %d drifted, %d new tokens, none with enough history",
+            len(drifted),
+            len(unseen),
+        )
+        return model, "reused"
+
+    model.profiles = model.profiles.merge(refit)
+    model.config = config
+    model.trained_at = _utc_now()
+    status = "profiles_refit"
+
+    if len(drifted) > config.max_drifted_fraction * max(len(model.profiles), 1):
+        model.forest = fit_forest(history, model.profiles, config)
+        model.forest_trained_at = model.trained_at
+        status = "forest_refit"
+
+    logger.info(
+        "Refreshed iforest model: %d drifted, %d new tokens (%s)", len(drifted), len(unseen), status
+    )
+    store.save(model)
+    return model, status
+
+
+def _latest_days(frame: pd.DataFrame, days: int) -> pd.DataFrame:
+    """Return the rows from the last ``days`` days present in ``frame``."""
+    dates = pd.to_datetime(frame[DATE_COLUMN])
+    return frame[dates > dates.max() - pd.Timedelta(days=days)]
+
+
+class ModelStore:
+    """Versioned on-disk storage for :class:`IForestModel` artifacts."""
+
+    def __init__(self, root: Union[str, Path], keep_versions: int = 5):
+        """Initialise the store.
+
+        Args:
+            root: Directory holding one ``vNNNN`` subdirectory per version.
+            keep_versions: Number of most recent versions kept on save.
+        """
+        self.root = Path(root)
+        self.keep_versions = keep_versions
+
+    def versions(self) -> List[int]:
+        """Return stored version numbers in ascending order."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            int(p.name[1:])
+            for p in self.root.iterdir()
+            if p.is_dir()
+            and p.name.startswith("v")
+            and p.name[1:].isdigit()
+            and (p / MANIFEST_FILE).exists()
+        )
+
+    def latest_version(self) -> Optional[int]:
+        """Return the newest stored version, or None when the store is empty."""
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def _path(self, version: int) -> Path:
+        return self.root / f"v{version:04d}"
+
+    def save(self, model: IForestModel) -> int:
+        """Persist a model as a new version and prune old versions.
+
+        Returns:
+            The version number assigned to the model.
+        """
+        version = (self.latest_version() or 0) + 1
+        path = self._path(version)
+        tmp = self.root / f".tmp-v{version:04d}"
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+
+        np.savez_compressed(
+            tmp / PROFILES_FILE,
+            tokens=model.profiles.tokens.astype(str),
+            medians=model.profiles.medians,
+            scales=model.profiles.scales,
+        )
+        joblib.dump(model.forest, tmp / FOREST_FILE, compress=3)
+        manifest = {
+            "version": version,
+            "trained_at": model.trained_at,
+            "forest_trained_at": model.forest_trained_at,
+            "features": list(FEATURE_COLUMNS),
+            "sklearn_version": sklearn.__version__,
+            "n_tokens": len(model.profiles),
+            "config": asdict(model.config),
+        }
+        (tmp / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        # Rename last so readers never see a half-written version
+        tmp.rename(path)
+
+        model.version = version
+        self._prune()
+        return version
+
+    def load(self, version: Optional[int] = None) -> Optional[IForestModel]:
+        """Load a stored model.
+
+        Args:
+            version: Version to load; defaults to the latest.
+
+        Returns:
+            The model, or None if nothing is stored or the stored artifacts
+            were built with different features or scikit-learn version.
+        """
+        version = version if version is not None else self.latest_version()
+        if version is None:
+            return None
+
+        path = self._path(version)
+        manifest = json.loads((path / MANIFEST_FILE).read_text())
+        if manifest["features"] != list(FEATURE_COLUMNS):
+            logger.warning("Ignoring iforest model v%d: feature set changed", version)
+            return None
+        if manifest["sklearn_version"] != sklearn.__version__:
+            logger.warning(
+                "Ignoring iforest model v%d: built with scikit-learn %s",
+                version,
+                manifest["sklearn_version"],
+            )
+            return None
+
+        with np.load(path / PROFILES_FILE, allow_pickle=False) as arrays:
+            profiles = TokenProfiles(
+                tokens=arrays["tokens"].astype(object),
+                medians=arrays["medians"],
+                scales=arrays["scales"],
+            )
+        return IForestModel(
+            profiles=profiles,
+            forest=joblib.load(path / FOREST_FILE),
+            config=IForestConfig(**manifest["config"]),
+            version=version,
+            trained_at=manifest["trained_at"],
+            forest_trained_at=manifest["forest_trained_at"],
+        )
+
+    def _prune(self) -> None:
+        for version in self.versions()[: -self.keep_versions]:
+            shutil.rmtree(self._path(version), ignore_errors=True)
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,247 @@
+"""
+Token leaderboard snapshot: build, write and publish.
+
+After each daily run the DAGs publish a compact snapshot of the tracked tokens
+(latest metrics, rankings and 30-day volume sparklines) that the API maps into
+memory and serves without touching ClickHouse. Numeric data is stored as flat
+little-endian arrays so the reader can view them straight out of the mapped
+file without copying or parsing.
+
+File layout::
+
+    0   magic          8 bytes, b"OTSNAP01"
+    8   header_length  uint32
+    12  reserved       uint32
+    16  header         UTF-8 JSON, zero-padded to an 8-byte boundary
+    ..  data           8-byte aligned arrays; ``header["arrays"]`` offsets
+                       are relative to the start of this section
+
+The header holds the snapshot date, token list, metric names and, for each
+array, its ``offset``, ``length`` and ``struct`` format character:
+
+- ``metrics``: float64, ``n_tokens x len(header["metrics"])``, row-major
+- ``sparklines``: float64, ``n_tokens x header["sparkline"]["days"]``
+- ``rank_<ranking>``: uint32 token indices, best first
+
+Snapshots are published into a directory: the file is written under a
+temporary name, renamed into place, and then the ``CURRENT`` pointer file is
+atomically replaced with its name. Readers therefore never see a partial
+snapshot and pick up a new one by watching ``CURRENT``.
+"""
+
+import json
+import logging
+import os
+import struct
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OTSNAP01"
+POINTER_FILE = "CURRENT"
+SNAPSHOT_SUFFIX = ".snap"
+
+_PREAMBLE = struct.Struct("<8sII")
+
+# Latest-day values stored per token, in column order
+METRIC_COLUMNS = (
+    "volume",
+    "tx_count",
+    "unique_addresses",
+    "price_change",
+    "anomaly_score",
+    "volume_usd",
+)
+# Rankings: name -> (metric, sort descending); tokens with a NaN value are left out.
+# Volume ranks by USD value, since token-unit volumes of different tokens don't compare.
+RANKINGS: Dict[str, Tuple[str, bool]] = {
+    "volume": ("volume_usd", True),
+    "tx_count": ("tx_count", True),
+    "unique_addresses": ("unique_addresses", True),
+    "anomaly_score": ("anomaly_score", False),
+}
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def build_token_snapshot(
+    metrics: pd.DataFrame,
+    anomalies: pd.DataFrame,
+    as_of: date,
+    tokens: Sequence[Mapping[str, Any]],
+    sparkline_days: int = 30,
+    prices: Optional[pd.DataFrame] = None,
+) -> bytes:
+    """Build a snapshot file's bytes.
+
+    Args:
+        metrics: ``token_metrics_daily`` rows (``token_address``, ``date``,
+            ``volume``, ``tx_count``, ``unique_addresses``, ``price_change``)
+            covering at least the sparkline window. ``volume`` is in raw units.
+        anomalies: ``anomalies`` rows (``entity_id``, ``ts``, ``score``); the
+            lowest score per token on ``as_of`` is kept (lower is more
+            anomalous, as with the Isolation Forest detector).
+        as_of: Snapshot date; its metrics become the "latest" values.
+        tokens: Tracked tokens with ``address``, ``symbol``, ``name`` and
+            ``decimals`` (as in ``tokens.yml``); duplicate addresses keep
+            the first entry. Volumes are converted to token units with
+            ``decimals``.
+        sparkline_days: Days of daily volume per sparkline, ending on ``as_of``.
+        prices: Optional daily USD closes (``token_address``, ``date``,
+            ``price``). ``volume_usd`` is the latest volume times the last
+            close on or before ``as_of``; tokens without one have no
+            ``volume_usd`` and are left out of the volume ranking.
+
+    Returns:
+        Snapshot in the format described in the module docstring.
+    """
+    unique: Dict[str, Mapping[str, Any]] = {}
+    for token in tokens:
+        unique.setdefault(token["address"].lower(), token)
+    addresses, tokens = list(unique), list(unique.values())
+    index = {address: i for i, address in enumerate(addresses)}
+    scale = np.array([10.0 ** int(t.get("decimals", 0)) for t in tokens])
+    start = as_of - timedelta(days=sparkline_days - 1)
+
+    frame = metrics.assign(
+        token_address=metrics["token_address"].str.lower(),
+        date=pd.to_datetime(metrics["date"]).dt.date,
+    )
+    frame = frame[frame["token_address"].isin(index) & frame["date"].between(start, as_of)]
+    rows = frame["token_address"].map(index).to_numpy()
+
+    sparklines = np.zeros((len(tokens), sparkline_days))
+    day_offsets = np.array([(d - start).days for d in frame["date"]], dtype=np.int64)
+    sparklines[rows, day_offsets] = frame["volume"].to_numpy(dtype=np.float64)
+    sparklines /= scale[:, None]
+
+    latest = np.full((len(tokens), len(METRIC_COLUMNS)), np.nan)
+    latest[:, :4] = 0.0  # no activity on as_of means zero, not unknown
+    today = frame[frame["date"] == as_of]
+    for column, name in enumerate(METRIC_COLUMNS[:4]):
+        latest[today["token_address"].map(index).to_numpy(), column] = today[name].to_numpy()
+    latest[:, 0] /= scale
+
+    if not anomalies.empty:
+        flagged = anomalies[pd.to_datetime(anomalies["ts"]).dt.date == as_of]
+        flagged = flagged.assign(entity_id=flagged["entity_id"].str.lower())
+        flagged = flagged[flagged["entity_id"].isin(index)].groupby("entity_id")["score"].min()
+        latest[flagged.index.map(index).to_numpy(dtype=np.int64), 4] = flagged.to_numpy()
+
+    if prices is not None and not prices.empty:
+        closes = prices.assign(
+            token_address=prices["token_address"].str.lower(),
+            date=pd.to_datetime(prices["date"]).dt.date,
+        )
+        closes = closes[closes["token_address"].isin(index) & (closes["date"] <= as_of)]
+        close = closes.sort_values("date").groupby("token_address")["price"].last()
+        priced = close.index.map(index).to_numpy(dtype=np.int64)
+        latest[priced, 5] = latest[priced, 0] * close.to_numpy(dtype=np.float64)
+
+    arrays: Dict[str, np.ndarray] = {
+        "metrics": latest.astype("<f8"),
+        "sparklines": sparklines.astype("<f8"),
+    }
+    for ranking, (metric, descending) in RANKINGS.items():
+        values = latest[:, METRIC_COLUMNS.index(metric)]
+        ranked = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(-values[ranked] if descending else values[ranked], kind="stable")
+        arrays[f"rank_{ranking}"] = ranked[order].astype("<u4")
+
+    header: Dict[str, Any] = {
+        "as_of": as_of.isoformat(),
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "metrics": list(METRIC_COLUMNS),
+        "rankings": list(RANKINGS),
+        "sparkline": {"metric": "volume", "start": start.isoformat(), "days": sparkline_days},
+        "tokens": [
+            {"address": a, "symbol": t.get("symbol"), "name": t.get("name")}
+            for a, t in zip(addresses, tokens)
+        ],
+        "arrays": {},
+    }
+    data = bytearray()
+    for name, array in arrays.items():
+        data.extend(b"\0" * (_align(len(data)) - len(data)))
+        header["arrays"][name] = {
+            "offset": len(data),
+            "length": int(array.size),
+            "format": "d" if array.dtype.kind == "f" else "I",
+        }
+        data.extend(array.tobytes())
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    preamble = _PREAMBLE.pack(MAGIC, len(header_bytes), 0) + header_bytes
+    out = bytearray(preamble)
+    out.extend(b"\0" * (_align(len(preamble)) - len(preamble)))
+    out.extend(data)
+    return bytes(out)
+
+
+def publish_token_snapshot(
+    metrics: pd.DataFrame,
+    anomalies: pd.DataFrame,
+    as_of: date,
+    output_dir: Union[str, Path],
+    tokens: Sequence[Mapping[str, Any]],
+    sparkline_days: int = 30,
+    keep: int = 3,
+    prices: Optional[pd.DataFrame] = None,
+) -> Path:
+    """Build a snapshot, publish it atomically and prune old ones.
+
+    Args:
+        metrics: See :func:`build_token_snapshot`.
+        anomalies: See :func:`build_token_snapshot`.
+        as_of: Snapshot date.
+        output_dir: Snapshot directory watched by the API.
+        tokens: Tracked tokens (see :func:`build_token_snapshot`).
+        sparkline_days: Days per sparkline.
+        keep: Snapshot files kept, including the new one.
+        prices: See :func:`build_token_snapshot`.
+
+    Returns:
+        Path of the published snapshot.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    content = build_token_snapshot(metrics, anomalies, as_of, tokens, sparkline_days, prices)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    # Publish time first, so name order is publish order even for backfills
+    path = output_dir / f"token_snapshot_{stamp}_{as_of:%Y%m%d}{SNAPSHOT_SUFFIX}"
+    _atomic_write(path, content)
+    _atomic_write(output_dir / POINTER_FILE, path.name.encode("utf-8"))
+    logger.info("Published token snapshot %s (%d bytes)", path.name, len(content))
+
+    _prune(output_dir, keep)
+    return path
+
+
+def _atomic_write(path: Path, content: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _prune(output_dir: Path, keep: int) -> None:
+    # Readers still mapping a removed file keep a valid mapping until they swap
+    snapshots: List[Path] = sorted(output_dir.glob(f"token_snapshot_*{SNAPSHOT_SUFFIX}"))
+    for path in snapshots[: max(0, len(snapshots) - keep)]:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,146 @@
+"""
+Compare RPC budget of log scanning strategies.
+
+Replays a chain fixture through an in-process JSON-RPC endpoint and reports,
+per 10k blocks, the eth_getLogs calls and response bytes for:
+
+  range.unfiltered       backfill: every log of every block range
+  range.filtered         backfill: tracked-token Transfer filter from tokens.yml
+  head.unfiltered        head following: every log of each block, by blockHash
+  head.filtered          head following: filtered, one call per block
+  head.filtered_bloom    head following: filtered, skipping blocks whose
+                         logsBloom rules out a tracked Transfer
+
+Filtered strategies are measured for all tracked tokens and for low-priority
+tokens only, since bloom skipping pays off when the tracked set is sparse.
+
+Usage:
+    # Deterministic synthetic chain (default: 10k blocks, ~150 logs/block)
+    python scripts/benchmark_log_scanner.py
+
+    # Record a real fixture once, then benchmark against it
+    python scripts/benchmark_log_scanner.py --record-from "$ALCHEMY_ETH_MAINNET_URL" \\
+        --from-block 18000000 --to-block 18000999 --fixture eth_18000000.jsonl.gz
+    python scripts/benchmark_log_scanner.py --fixture eth_18000000.jsonl.gz
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingestion.chains.eth_mainnet.log_scanner import (  # noqa: E402
+    DEFAULT_MAX_BLOCK_RANGE,
+    TOKENS_CONFIG,
+    LogScanner,
+)
+from ingestion.common.rpc_client import JsonRpcClient  # noqa: E402
+from tests.fakes.eth_rpc import FixtureRpc, RecordedChain, record_chain  # noqa: E402
+from tests.fakes.synthetic_chain import SyntheticChain, token_population  # noqa: E402
+
+
+def tracked_priorities() -> dict:
+    """Return tracked token address -> priority from tokens.yml."""
+    with open(TOKENS_CONFIG) as f:
+        tokens = yaml.safe_load(f)["tokens"]["tracked_tokens"]
+    return {t["address"].lower(): t["priority"] for t in tokens}
+
+
+def _unfiltered_range(rpc, start, end):
+    rpc.call("eth_getLogs", [{"fromBlock": hex(start), "toBlock": hex(end)}])
+
+
+def _unfiltered_head(rpc, headers):
+    for header in headers:
+        rpc.call("eth_getLogs", [{"blockHash": header["hash"]}])
+
+
+def main() -> None:
+    """Run the benchmark and print results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark log scanner RPC usage")
+    parser.add_argument("--fixture", help="Recorded .jsonl.gz fixture (default: synthetic chain)")
+    parser.add_argument("--record-from", help="RPC URL to record --fixture from, then exit")
+    parser.add_argument("--from-block", type=int, default=18_000_000)
+    parser.add_argument("--to-block", type=int)
+    parser.add_argument("--blocks", type=int, default=10_000, help="Synthetic chain length")
+    parser.add_argument("--logs-per-block", type=int, default=150, help="Synthetic mean")
+    parser.add_argument("--max-block-range", type=int, default=DEFAULT_MAX_BLOCK_RANGE)
+    args = parser.parse_args()
+
+    if args.record_from:
+        to_block = args.to_block or args.from_block + args.blocks - 1
+        record_chain(JsonRpcClient(args.record_from), args.from_block, to_block, args.fixture)
+        print(f"Recorded blocks {args.from_block}-{to_block} to {args.fixture}")
+        return
+
+    priorities = tracked_priorities()
+    if args.fixture:
+        chain = RecordedChain.load(args.fixture)
+    else:
+        chain = SyntheticChain(
+            token_population(priorities),
+            start_block=args.from_block,
+            n_blocks=args.blocks,
+            mean_logs_per_block=args.logs_per_block,
+        )
+    token_sets = {
+        "all_tracked": sorted(priorities),
+        "low_priority": sorted(a for a, p in priorities.items() if p == "low"),
+    }
+
+    rpcs = {"range.unfiltered": FixtureRpc(chain, 10**9), "head.unfiltered": FixtureRpc(chain)}
+    scanners = {}
+    for name, addresses in token_sets.items():
+        for mode in ("range.filtered", "head.filtered", "head.filtered_bloom"):
+            key = f"{name}.{mode}"
+            rpcs[key] = FixtureRpc(chain)
+            scanners[key] = LogScanner(
+                rpcs[key],
+                addresses,
+                max_block_range=args.max_block_range,
+                use_bloom=mode.endswith("bloom"),
+            )
+
+    # Walk the chain window by window so every strategy sees the same blocks
+    # while they are still cached by the chain source
+    started = time.perf_counter()
+    for start in range(chain.start_block, chain.last_block + 1, args.max_block_range):
+        end = min(start + args.max_block_range - 1, chain.last_block)
+        headers = [chain.header(n) for n in range(start, end + 1)]
+        _unfiltered_range(rpcs["range.unfiltered"], start, end)
+        _unfiltered_head(rpcs["head.unfiltered"], headers)
+        for key, scanner in scanners.items():
+            if ".range." in key:
+                scanner.scan_range(start, end)
+            else:
+                scanner.scan_blocks(headers)
+
+    n_blocks = chain.last_block - chain.start_block + 1
+    per_10k = 10_000 / n_blocks
+    report = {
+        "source": args.fixture or "synthetic",
+        "blocks": n_blocks,
+        "elapsed_seconds": round(time.perf_counter() - started, 1),
+        "per_10k_blocks": {},
+    }
+    baseline = rpcs["range.unfiltered"].stats
+    for key, rpc in rpcs.items():
+        entry = {
+            "rpc_calls": round(rpc.stats.calls * per_10k),
+            "mb_fetched": round(rpc.stats.bytes_received * per_10k / 1e6, 2),
+            "bytes_vs_unfiltered": round(rpc.stats.bytes_received / baseline.bytes_received, 4),
+        }
+        if key in scanners:
+            entry["logs"] = round(scanners[key].stats.logs * per_10k)
+            entry["blocks_skipped"] = round(scanners[key].stats.blocks_skipped * per_10k)
+        report["per_10k_blocks"][key] = entry
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+End-to-end pipeline throughput benchmark.
+
+Runs scanner -> producer -> loader -> aggregation -> anomaly scoring on a
+deterministic synthetic chain with in-process fakes, prints a JSON report and
+compares it against the stored baseline for the profile. Exits with status 1
+if any stage regressed by more than the threshold.
+
+Usage:
+    python scripts/benchmark_pipeline.py                      # default profile
+    python scripts/benchmark_pipeline.py --profile smoke --threshold 0.5
+    python scripts/benchmark_pipeline.py --output report.json
+    python scripts/benchmark_pipeline.py --update-baseline    # after an intended change
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tests.load.pipeline_benchmark import (  # noqa: E402
+    PROFILES,
+    baseline_path,
+    compare_reports,
+    load_report,
+    run_benchmark,
+    save_report,
+)
+
+
+def main() -> int:
+    """Run the benchmark and return the process exit code."""
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline end to end")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default")
+    parser.add_argument("--output", help="Also write the report to this path")
+    parser.add_argument("--baseline", help="Baseline report (default: stored profile baseline)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Store report as baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(PROFILES[args.profile], args.profile)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        save_report(report, args.output)
+
+    path = Path(args.baseline) if args.baseline else baseline_path(args.profile)
+    if args.update_baseline:
+        save_report(report, path)
+        print(f"Baseline written to {path}", file=sys.stderr)
+        return 0
+
+    baseline = load_report(path)
+    if baseline is None:
+        print(f"No baseline at {path}; run with --update-baseline to create it", file=sys.stderr)
+        return 0
+
+    regressions = compare_reports(report, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions above {args.threshold:.0%} vs {path}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Microbenchmark for the API rate limiting middleware.
+
+Reports the per-request cost of each bucket backend and of the middleware as
+a whole (versus calling the wrapped ASGI app directly), and checks that the
+shared backend enforces one combined limit across worker processes.
+
+Usage:
+    python scripts/benchmark_rate_limiter.py
+    python scripts/benchmark_rate_limiter.py --requests 1000000 --clients 50000
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from app.rate_limit import (  # noqa: E402
+    MemoryBackend,
+    RateLimit,
+    RateLimitMiddleware,
+    SharedMemoryBackend,
+)
+
+# High enough that every benchmark request is allowed, so the happy path is timed
+UNLIMITED = RateLimit(requests_per_minute=10**9, burst_size=10**6)
+
+
+def time_backend(backend, keys) -> float:
+    """Return microseconds per ``acquire`` cycling through ``keys``."""
+    acquire = backend.acquire
+    started = time.perf_counter()
+    for key in keys:
+        acquire(key)
+    return (time.perf_counter() - started) / len(keys) * 1e6
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+
+async def _send(message):
+    pass
+
+
+async def _time_asgi(app, scopes) -> float:
+    started = time.perf_counter()
+    for scope in scopes:
+        await app(scope, None, _send)
+    return (time.perf_counter() - started) / len(scopes) * 1e6
+
+
+def time_middleware(backend, keys) -> float:
+    """Return microseconds the middleware adds per request."""
+    scopes = [{"type": "http", "path": "/tokens/top", "client": (key, 50000)} for key in keys]
+    bare = asyncio.run(_time_asgi(_app, scopes))
+    wrapped = asyncio.run(_time_asgi(RateLimitMiddleware(_app, backend), scopes))
+    return wrapped - bare
+
+
+def _worker(path: str, limit: RateLimit, seconds: float, start, results) -> None:
+    backend = SharedMemoryBackend(limit, path)
+    start.wait()
+    allowed = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        allowed += backend.acquire("203.0.113.7") == 0.0
+    results.put(allowed)
+
+
+def check_combined_limit(path: str, workers: int, seconds: float) -> dict:
+    """Hammer one client key from ``workers`` processes and count allowed requests."""
+    limit = RateLimit(requests_per_minute=100, burst_size=20)
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Barrier(workers), context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(path, limit, seconds, start, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    allowed = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return {
+        "workers": workers,
+        "seconds": seconds,
+        "allowed": allowed,
+        "expected_max": int(limit.burst_size + limit.rate * seconds),
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter overhead")
+    parser.add_argument("--requests", type=int, default=500_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    keys = [f"10.0.{i // 256 % 256}.{i % 256}" for i in range(args.clients)]
+    keys = (keys * (args.requests // len(keys) + 1))[: args.requests]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = SharedMemoryBackend(UNLIMITED, Path(tmp) / "buckets.bin")
+        report = {
+            "requests": args.requests,
+            "clients": args.clients,
+            "us_per_acquire": {
+                "memory": round(time_backend(MemoryBackend(UNLIMITED), keys), 3),
+                "memory_evicting": round(
+                    time_backend(MemoryBackend(UNLIMITED, max_keys=args.clients // 10), keys), 3
+                ),
+                "shared": round(time_backend(shared, keys), 3),
+            },
+            "us_added_by_middleware": {
+                "memory": round(time_middleware(MemoryBackend(UNLIMITED), keys), 3),
+                "shared": round(time_middleware(shared, keys), 3),
+            },
+            "combined_limit": check_combined_limit(
+                str(Path(tmp) / "combined.bin"), args.workers, args.seconds
+            ),
+        }
+        shared.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Replay dead-lettered raw messages to their source topics.
+
+Run after fixing whatever made the loader reject the messages (a schema
+change, a producer bug). Replayed records go through normal validation again;
+records that still fail land back in the DLQ with an incremented attempt.
+
+Usage:
+    python scripts/replay_dlq.py eth.logs.raw
+    python scripts/replay_dlq.py eth.blocks.raw --error-type invalid_field --dry-run
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingestion.common.dlq import dlq_topic, replay_dead_letters  # noqa: E402
+from ingestion.common.kafka_client import create_consumer, create_producer  # noqa: E402
+
+
+def main() -> int:
+    """Parse arguments and run the replay."""
+    parser = argparse.ArgumentParser(description="Replay *.dlq topics to their source topics")
+    parser.add_argument("topics", nargs="+", help="Source topics whose DLQ should be replayed")
+    parser.add_argument("--error-type", help="Only replay records with this error type")
+    parser.add_argument("--max-attempts", type=int, help="Skip records dead-lettered this often")
+    parser.add_argument("--max-messages", type=int, help="Stop after this many records")
+    parser.add_argument("--group-id", default="oracul-dlq-replay", help="Replay consumer group")
+    parser.add_argument("--dry-run", action="store_true", help="Count without producing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    consumer = create_consumer([dlq_topic(t) for t in args.topics], group_id=args.group_id)
+    producer = create_producer()
+    try:
+        stats = replay_dead_letters(
+            consumer,
+            producer,
+            error_type=args.error_type,
+            max_attempts=args.max_attempts,
+            max_messages=args.max_messages,
+            dry_run=args.dry_run,
+        )
+    finally:
+        producer.close()
+        consumer.close()
+
+    print(f"replayed={stats.replayed} skipped={stats.skipped} unreadable={stats.unreadable}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
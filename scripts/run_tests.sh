@@ -15,6 +15,7 @@
 #   api          - Run API tests only
 #   integration  - Run integration tests only (requires services running)
 #   pipeline     - Run pipeline tests only (Phase 3+)
+#   load         - Run end-to-end throughput benchmark vs stored baseline (slow)
 #
 # Examples:
 #   ./scripts/run_tests.sh             # Run all tests
@@ -293,6 +294,27 @@ run_pipeline_tests() {
     fi
 }
 
+# =============================================================================
+# Load Tests
+# =============================================================================
+
+run_load_tests() {
+    print_section "Running Load Tests"
+
+    cd "$PROJECT_ROOT"
+
+    # Timings must not include coverage tracing
+    if python scripts/benchmark_pipeline.py --profile "${BENCHMARK_PROFILE:-default}" \
+        --threshold "${BENCHMARK_THRESHOLD:-0.25}" --output "benchmark-report.json" > /dev/null; then
+        print_status "Load tests passed (report: benchmark-report.json)"
+        return 0
+    else
+        print_error "Throughput regressed against the stored baseline"
+        FAILED=1
+        return 1
+    fi
+}
+
 # =============================================================================
 # Coverage Report
 # =============================================================================
@@ -343,6 +365,10 @@ case "$TEST_TYPE" in
         run_pipeline_tests
         ;;
 
+    "load")
+        run_load_tests
+        ;;
+
     "all")
         run_linters
         run_unit_tests
@@ -355,7 +381,7 @@ case "$TEST_TYPE" in
     *)
         print_error "Unknown test type: $TEST_TYPE"
         echo ""
-        echo "Usage: $0 [all|lint|unit|api|integration|pipeline]"
+        echo "Usage: $0 [all|lint|unit|api|integration|pipeline|load]"
         echo ""
         exit 1
         ;;
@@ -0,0 +1 @@
+# In-process fakes for external services used by tests
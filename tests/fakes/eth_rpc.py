@@ -0,0 +1,154 @@
+"""Fixture-backed Ethereum JSON-RPC fake.
+
+Serves ``eth_getLogs``, ``eth_getBlockByNumber`` and ``eth_blockNumber`` from a
+chain source (a :class:`RecordedChain` loaded from disk or a synthetic chain),
+applying address/topic filters the way a node does and counting calls and
+serialised response bytes like :class:`~ingestion.common.rpc_client.JsonRpcClient`.
+"""
+
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from ingestion.common.rpc_client import RpcError, RpcStats
+
+
+class RecordedChain:
+    """Blocks recorded from a real node: one JSON line per block, gzipped."""
+
+    def __init__(self, blocks: Dict[int, Dict[str, Any]]):
+        """Initialise from ``{number: {"header": ..., "logs": [...]}}``."""
+        self.blocks = blocks
+        self.start_block = min(blocks)
+        self.last_block = max(blocks)
+        self._numbers = {block["header"]["hash"]: n for n, block in blocks.items()}
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "RecordedChain":
+        """Load a fixture written by :func:`record_chain`."""
+        blocks = {}
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                block = json.loads(line)
+                blocks[int(block["header"]["number"], 16)] = block
+        return cls(blocks)
+
+    def header(self, number: int) -> Dict[str, Any]:
+        """Return the recorded header."""
+        return self.blocks[number]["header"]
+
+    def logs(self, number: int) -> List[Dict[str, Any]]:
+        """Return the recorded logs."""
+        return self.blocks[number]["logs"]
+
+    def block_number(self, block_hash: str) -> int:
+        """Return the number of a recorded block by hash."""
+        return self._numbers[block_hash]
+
+
+def record_chain(rpc: Any, from_block: int, to_block: int, path: Union[str, Path]) -> None:
+    """Record headers and all logs of ``[from_block, to_block]`` to a fixture file.
+
+    Args:
+        rpc: Client with a ``call(method, params)`` method (real node or fake).
+        from_block: First block (inclusive).
+        to_block: Last block (inclusive).
+        path: Output ``.jsonl.gz`` path.
+    """
+    with gzip.open(path, "wt") as f:
+        for number in range(from_block, to_block + 1):
+            header = rpc.call("eth_getBlockByNumber", [hex(number), False])
+            logs = rpc.call("eth_getLogs", [{"blockHash": header["hash"]}])
+            keep = ("number", "hash", "parentHash", "timestamp", "logsBloom", "transactions")
+            f.write(json.dumps({"header": {k: header[k] for k in keep}, "logs": logs}) + "\n")
+
+
+def _matches(log: Dict[str, Any], addresses: Optional[set], topics: List[Any]) -> bool:
+    if addresses is not None and log["address"].lower() not in addresses:
+        return False
+    for position, wanted in enumerate(topics):
+        if wanted is None:
+            continue
+        if position >= len(log["topics"]):
+            return False
+        accepted = wanted if isinstance(wanted, list) else [wanted]
+        if log["topics"][position] not in accepted:
+            return False
+    return True
+
+
+class FixtureRpc:
+    """In-process JSON-RPC endpoint over a chain source."""
+
+    def __init__(self, chain: Any, max_results: int = 10_000, limit_error_code: int = -32005):
+        """Initialise the endpoint.
+
+        Args:
+            chain: Object with ``start_block``, ``last_block``, ``header(n)``,
+                ``logs(n)`` and ``block_number(hash)``.
+            max_results: ``eth_getLogs`` result limit; larger results raise
+                error -32005 like hosted providers do.
+            limit_error_code: Error code for the result limit; some providers
+                use -32602 with a limit message instead.
+        """
+        self.chain = chain
+        self.max_results = max_results
+        self.limit_error_code = limit_error_code
+        self.stats = RpcStats()
+        self.methods: Dict[str, int] = {}
+
+    def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """Dispatch a JSON-RPC call and account for its response size."""
+        params = params or []
+        self.methods[method] = self.methods.get(method, 0) + 1
+        self.stats.calls += 1
+        try:
+            if method == "eth_blockNumber":
+                result: Any = hex(self.chain.last_block)
+            elif method == "eth_getBlockByNumber":
+                result = self.chain.header(int(params[0], 16))
+            elif method == "eth_getLogs":
+                result = self._get_logs(params[0])
+            else:
+                raise RpcError(-32601, f"the method {method} does not exist/is not available")
+        except RpcError as exc:
+            error = {"code": exc.code, "message": exc.message}
+            self.stats.bytes_received += len(json.dumps({"jsonrpc": "2.0", "error": error}))
+            raise
+
+        self.stats.bytes_received += len(
+            json.dumps({"jsonrpc": "2.0", "id": self.stats.calls, "result": result})
+        )
+        return result
+
+    def _get_logs(self, log_filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+        address = log_filter.get("address")
+        addresses = None
+        if address is not None:
+            addresses = {a.lower() for a in (address if isinstance(address, list) else [address])}
+            for a in addresses:
+                if len(a) != 42:
+                    raise RpcError(
+                        -32602,
+                        f"invalid argument 0: hex string has length {len(a) - 2}, "
+                        "want 40 for common.Address",
+                    )
+        topics = log_filter.get("topics") or []
+
+        if "blockHash" in log_filter:
+            try:
+                numbers: Any = [self.chain.block_number(log_filter["blockHash"])]
+            except KeyError:
+                raise RpcError(-32000, "unknown block") from None
+        else:
+            numbers = range(int(log_filter["fromBlock"], 16), int(log_filter["toBlock"], 16) + 1)
+
+        result = [
+            log for n in numbers for log in self.chain.logs(n) if _matches(log, addresses, topics)
+        ]
+        if len(result) > self.max_results:
+            raise RpcError(
+                self.limit_error_code, f"query returned more than {self.max_results} results"
+            )
+        return result
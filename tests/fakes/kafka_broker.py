@@ -0,0 +1,184 @@
+"""In-process Kafka fake for tests that must not depend on a running broker.
+
+Mirrors the subset of the kafka-python API used by the ingestion code:
+``send`` (returning a future) and ``flush`` on producers and ``poll``/``commit``/``assignment``/
+``end_offsets``/``position`` on consumers, with committed offsets tracked per
+consumer group.
+"""
+
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class TopicPartition(NamedTuple):
+    """Topic/partition pair, as returned in ``poll()`` results."""
+
+    topic: str
+    partition: int
+
+
+class FakeRecord(NamedTuple):
+    """Consumer record with the same attributes as kafka-python's ConsumerRecord."""
+
+    topic: str
+    partition: int
+    offset: int
+    timestamp: int
+    key: Optional[bytes]
+    value: Optional[bytes]
+    headers: List[Tuple[str, bytes]]
+
+
+class FakeBroker:
+    """Single-partition topics held in memory."""
+
+    def __init__(self):
+        """Initialise an empty broker."""
+        self.topics: Dict[str, List[FakeRecord]] = defaultdict(list)
+        self.committed: Dict[Tuple[str, str], int] = {}
+
+    def append(
+        self,
+        topic: str,
+        value: Optional[bytes],
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None,
+    ) -> FakeRecord:
+        """Append a record to a topic and return it."""
+        log = self.topics[topic]
+        record = FakeRecord(
+            topic, 0, len(log), int(time.time() * 1000), key, value, list(headers or [])
+        )
+        log.append(record)
+        return record
+
+    def values(self, topic: str) -> List[Optional[bytes]]:
+        """Return all record values in a topic."""
+        return [r.value for r in self.topics.get(topic, [])]
+
+    def producer(self, fail_topics: Iterable[str] = ()) -> "FakeProducer":
+        """Create a producer bound to this broker.
+
+        Sends to ``fail_topics`` are never delivered; their futures raise,
+        like kafka-python's after the retries of a send are exhausted.
+        """
+        return FakeProducer(self, fail_topics)
+
+    def consumer(
+        self, *topics: str, group_id: str = "test-group", join_polls: int = 0
+    ) -> "FakeConsumer":
+        """Create a consumer bound to this broker.
+
+        ``join_polls`` simulates a group rebalance: that many polls return
+        nothing and leave the consumer without an assignment.
+        """
+        return FakeConsumer(self, topics, group_id, join_polls)
+
+
+class FakeFuture:
+    """Result of a send, with kafka-python's blocking ``get``."""
+
+    def __init__(self, error: Optional[Exception] = None):
+        """Initialise a future that fails with ``error``, if given."""
+        self.error = error
+        self.record: Optional[FakeRecord] = None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[FakeRecord]:
+        """Return the delivered record or raise the send error."""
+        if self.error is not None:
+            raise self.error
+        return self.record
+
+
+class FakeProducer:
+    """Producer that appends to a :class:`FakeBroker` after ``flush``."""
+
+    def __init__(self, broker: FakeBroker, fail_topics: Iterable[str] = ()):
+        """Initialise the producer."""
+        self.broker = broker
+        self.fail_topics = set(fail_topics)
+        self.buffer: List[Tuple[FakeFuture, str, Any, Any, Any]] = []
+        self.flushes = 0
+
+    def send(
+        self, topic: str, value: Any = None, key: Any = None, headers: Any = None
+    ) -> FakeFuture:
+        """Buffer a record until the next flush."""
+        error = (
+            ConnectionError(f"Delivery to {topic} failed") if topic in self.fail_topics else None
+        )
+        future = FakeFuture(error)
+        self.buffer.append((future, topic, value, key, headers))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Deliver buffered records to the broker; like kafka-python, never raises."""
+        for future, topic, value, key, headers in self.buffer:
+            if future.error is None:
+                future.record = self.broker.append(topic, value, key, headers)
+        self.buffer.clear()
+        self.flushes += 1
+
+    def close(self) -> None:
+        """Flush outstanding records."""
+        self.flush()
+
+
+class FakeConsumer:
+    """Consumer with per-group committed offsets and manual commits."""
+
+    def __init__(
+        self, broker: FakeBroker, topics: Tuple[str, ...], group_id: str, join_polls: int = 0
+    ):
+        """Initialise the consumer at the group's committed offsets."""
+        self.broker = broker
+        self.group_id = group_id
+        self.positions = {t: broker.committed.get((group_id, t), 0) for t in topics}
+        self.join_polls = join_polls
+        self.polls = 0
+        self.commits = 0
+
+    def assignment(self) -> Set[TopicPartition]:
+        """Return assigned partitions; empty while the group is joining."""
+        if self.join_polls > 0:
+            return set()
+        return {TopicPartition(t, 0) for t in self.positions}
+
+    def end_offsets(self, partitions: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        """Return the offset after the last record of each partition."""
+        return {tp: len(self.broker.topics.get(tp.topic, [])) for tp in partitions}
+
+    def position(self, partition: TopicPartition) -> int:
+        """Return the offset of the next record to fetch."""
+        return self.positions[partition.topic]
+
+    def poll(
+        self, timeout_ms: int = 0, max_records: Optional[int] = None
+    ) -> Dict[TopicPartition, List[FakeRecord]]:
+        """Return up to ``max_records`` records past the current positions."""
+        self.polls += 1
+        if self.join_polls > 0:
+            self.join_polls -= 1
+            return {}
+        result: Dict[TopicPartition, List[FakeRecord]] = {}
+        budget = max_records if max_records is not None else float("inf")
+        for topic, position in self.positions.items():
+            if budget <= 0:
+                break
+            log = self.broker.topics.get(topic, [])
+            records = log[position : position + int(min(budget, len(log)))]
+            if records:
+                result[TopicPartition(topic, 0)] = records
+                self.positions[topic] = position + len(records)
+                budget -= len(records)
+        return result
+
+    def commit(self) -> None:
+        """Commit current positions for the group."""
+        for topic, position in self.positions.items():
+            self.broker.committed[(self.group_id, topic)] = position
+        self.commits += 1
+
+    def close(self) -> None:
+        """No-op for API compatibility."""
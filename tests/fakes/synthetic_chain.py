@@ -0,0 +1,177 @@
+"""Deterministic synthetic Ethereum chain for tests and benchmarks.
+
+Each block is derived from ``(seed, block number)`` alone, so any block can be
+regenerated on demand and long chains cost no memory. Token and address
+activity follow Zipf distributions: a few contracts (stablecoins, WETH) appear
+in almost every block while the long tail is rare, which is what makes
+``logsBloom`` filtering behave as it does on mainnet.
+"""
+
+import bisect
+import itertools
+import random
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Sequence
+
+from ingestion.chains.eth_mainnet.log_scanner import TRANSFER_TOPIC, compute_logs_bloom
+
+APPROVAL_TOPIC = "0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925"
+SWAP_TOPIC = "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822"
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# Popularity rank ranges for tracked tokens by priority (0 = most active)
+_PRIORITY_RANKS = {"high": (0, 12), "medium": (15, 120), "low": (300, 2000)}
+
+
+def _address(index: int, salt: int) -> str:
+    return f"0x{(index * 0x9E3779B97F4A7C15 + salt * 0xC2B2AE3D27D4EB4F) % (1 << 160):040x}"
+
+
+def _pad_topic(address: str) -> str:
+    return "0x" + "0" * 24 + address[2:]
+
+
+def _zipf_cdf(n: int, s: float) -> List[float]:
+    weights = [1.0 / (rank + 1) ** s for rank in range(n)]
+    total = sum(weights)
+    return list(itertools.accumulate(w / total for w in weights))
+
+
+def token_population(tracked: Mapping[str, str], n_tokens: int = 5000, seed: int = 42) -> List[str]:
+    """Return token contracts ordered by activity, with tracked tokens placed by priority.
+
+    Args:
+        tracked: Tracked token address -> priority (``high``/``medium``/``low``).
+        n_tokens: Total number of token contracts on the chain.
+        seed: Random seed.
+    """
+    rng = random.Random(seed)
+    tokens: List[str] = [_address(i, salt=1) for i in range(n_tokens - len(tracked))]
+    for address, priority in sorted(tracked.items(), key=lambda item: item[0]):
+        low, high = _PRIORITY_RANKS.get(priority, _PRIORITY_RANKS["low"])
+        tokens.insert(min(rng.randint(low, high), len(tokens)), address.lower())
+    return tokens
+
+
+class SyntheticChain:
+    """Chain of blocks carrying ERC-20 Transfer, Approval and AMM logs."""
+
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        start_block: int = 18_000_000,
+        n_blocks: int = 10_000,
+        seed: int = 42,
+        mean_logs_per_block: int = 150,
+        n_addresses: int = 200_000,
+        n_pools: int = 2000,
+        block_time_seconds: int = 12,
+    ):
+        """Initialise the chain.
+
+        Args:
+            tokens: Token contracts ordered by activity (see :func:`token_population`).
+            start_block: First block number.
+            n_blocks: Number of blocks.
+            seed: Random seed; the same seed always yields the same chain.
+            mean_logs_per_block: Average number of logs per block.
+            n_addresses: Size of the holder address population.
+            n_pools: Number of AMM pool contracts.
+            block_time_seconds: Seconds between block timestamps; raise it to
+                spread a short chain over many days.
+        """
+        self.tokens = list(tokens)
+        self.start_block = start_block
+        self.n_blocks = n_blocks
+        self.seed = seed
+        self.mean_logs_per_block = mean_logs_per_block
+        self.block_time_seconds = block_time_seconds
+        self.addresses = [_address(i, salt=2) for i in range(n_addresses)]
+        self.pools = [_address(i, salt=3) for i in range(n_pools)]
+        self._token_cdf = _zipf_cdf(len(self.tokens), 1.1)
+        self._address_cdf = _zipf_cdf(n_addresses, 0.9)
+        self._pool_cdf = _zipf_cdf(n_pools, 1.0)
+        self._numbers: Dict[str, int] = {}
+        # Per-instance cache: a method-level lru_cache would be shared by all chains
+        self._generate = lru_cache(maxsize=256)(self._build_block)
+
+    @property
+    def last_block(self) -> int:
+        """Return the number of the last block."""
+        return self.start_block + self.n_blocks - 1
+
+    def _pick(self, rng: random.Random, population: Sequence[str], cdf: List[float]) -> str:
+        return population[min(bisect.bisect_left(cdf, rng.random()), len(population) - 1)]
+
+    def _block_hash(self, number: int) -> str:
+        return f"0x{random.Random(self.seed * 7919 + number).getrandbits(256):064x}"
+
+    def _build_block(self, number: int) -> Dict[str, Any]:
+        rng = random.Random(self.seed * 1_000_003 + number)
+        block_hash = self._block_hash(number)
+        self._numbers[block_hash] = number
+        n_logs = max(0, round(rng.gauss(self.mean_logs_per_block, self.mean_logs_per_block * 0.35)))
+
+        logs: List[Dict[str, Any]] = []
+        transactions: List[str] = []
+        while len(logs) < n_logs:
+            tx_hash = f"0x{rng.getrandbits(256):064x}"
+            transactions.append(tx_hash)
+            for _ in range(min(rng.choice((1, 1, 1, 2, 3, 4)), n_logs - len(logs))):
+                kind = rng.random()
+                if kind < 0.7:
+                    address = self._pick(rng, self.tokens, self._token_cdf)
+                    sender = self._pick(rng, self.addresses, self._address_cdf)
+                    receiver = self._pick(rng, self.addresses, self._address_cdf)
+                    topics = [TRANSFER_TOPIC, _pad_topic(sender), _pad_topic(receiver)]
+                    data = f"0x{rng.getrandbits(96):064x}"
+                elif kind < 0.8:
+                    address = self._pick(rng, self.tokens, self._token_cdf)
+                    owner = self._pick(rng, self.addresses, self._address_cdf)
+                    spender = self._pick(rng, self.pools, self._pool_cdf)
+                    topics = [APPROVAL_TOPIC, _pad_topic(owner), _pad_topic(spender)]
+                    data = "0x" + "f" * 64
+                elif kind < 0.9:
+                    address = self._pick(rng, self.pools, self._pool_cdf)
+                    topics = [SYNC_TOPIC]
+                    data = f"0x{rng.getrandbits(112):064x}{rng.getrandbits(112):064x}"
+                else:
+                    address = self._pick(rng, self.pools, self._pool_cdf)
+                    router = self._pick(rng, self.addresses, self._address_cdf)
+                    topics = [SWAP_TOPIC, _pad_topic(router), _pad_topic(router)]
+                    data = "0x" + "".join(f"{rng.getrandbits(96):064x}" for _ in range(4))
+                logs.append(
+                    {
+                        "address": address,
+                        "topics": topics,
+                        "data": data,
+                        "blockNumber": hex(number),
+                        "blockHash": block_hash,
+                        "transactionHash": tx_hash,
+                        "transactionIndex": hex(len(transactions) - 1),
+                        "logIndex": hex(len(logs)),
+                        "removed": False,
+                    }
+                )
+
+        header = {
+            "number": hex(number),
+            "hash": block_hash,
+            "parentHash": self._block_hash(number - 1),
+            "timestamp": hex(1_700_000_000 + self.block_time_seconds * (number - self.start_block)),
+            "logsBloom": compute_logs_bloom(logs),
+            "transactions": transactions,
+        }
+        return {"header": header, "logs": logs}
+
+    def header(self, number: int) -> Dict[str, Any]:
+        """Return the block header (``eth_getBlockByNumber`` with tx hashes)."""
+        return self._generate(number)["header"]
+
+    def logs(self, number: int) -> List[Dict[str, Any]]:
+        """Return all logs of a block in RPC format."""
+        return self._generate(number)["logs"]
+
+    def block_number(self, block_hash: str) -> int:
+        """Return the number of a block already generated, by hash."""
+        return self._numbers[block_hash]
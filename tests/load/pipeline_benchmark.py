@@ -0,0 +1,409 @@
+"""
+End-to-end pipeline throughput benchmark on a synthetic chain.
+
+Drives the ingestion and analytics path in-process::
+
+    scan       LogScanner.scan_range over a fixture RPC endpoint
+    produce    block and log messages to a fake Kafka broker
+    load       RawTopicLoader into an in-memory ClickHouse stand-in
+    aggregate  daily decode + token_metrics_daily, one run per chain day
+    anomaly    multivariate detector, one run per scored day (first run trains)
+
+Each stage reports throughput, per-batch latency percentiles and peak RSS.
+Stages run one after another rather than interleaved, so time and memory are
+attributed to a single stage. Reports are plain JSON and can be compared
+against a stored baseline with :func:`compare_reports`.
+"""
+
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from ingestion.chains.eth_mainnet.log_scanner import TOKENS_CONFIG, LogScanner, publish_logs
+from ingestion.common.raw_loader import RawTopicLoader
+from pipelines.jobs.aggregates.compute_token_metrics_daily import (
+    compute_token_metrics_daily,
+    decode_transfers,
+)
+from pipelines.jobs.anomalies.detect_token_multivariate_anomalies import (
+    detect_token_multivariate_anomalies,
+)
+from pipelines.libs.iforest_utils import IForestConfig
+from tests.fakes.eth_rpc import FixtureRpc
+from tests.fakes.kafka_broker import FakeBroker
+from tests.fakes.synthetic_chain import SyntheticChain, token_population
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+BLOCKS_TOPIC = "eth.blocks.raw"
+LOGS_TOPIC = "eth.logs.raw"
+STAGES = ("scan", "produce", "load", "aggregate", "anomaly")
+
+# Workload counters that must match the baseline for timings to be comparable
+WORKLOAD_KEYS = ("blocks", "logs", "raw_rows", "transfers", "token_days")
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    """Synthetic workload and batch sizes for one benchmark profile."""
+
+    n_blocks: int = 10_000
+    mean_logs_per_block: int = 50
+    days: int = 30
+    score_days: int = 5
+    n_tokens: int = 3000
+    n_addresses: int = 100_000
+    n_pools: int = 1000
+    seed: int = 42
+    max_block_range: int = 100
+    loader_batch_size: int = 500
+
+    @property
+    def block_time_seconds(self) -> int:
+        """Block spacing that spreads the chain over ``days``."""
+        return max(1, self.days * 86_400 // self.n_blocks)
+
+
+PROFILES: Dict[str, BenchmarkConfig] = {
+    "smoke": BenchmarkConfig(n_blocks=2_000, mean_logs_per_block=30, days=21, score_days=3),
+    "default": BenchmarkConfig(),
+}
+
+
+class MemoryTable:
+    """In-memory ClickHouse stand-in: rows appended per table."""
+
+    def __init__(self):
+        """Initialise empty tables."""
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+
+    def insert(
+        self,
+        table: str,
+        columns: List[str],
+        rows: List[Dict[str, Any]],
+        dedup_token: Optional[str] = None,
+    ) -> None:
+        """Append a bulk insert."""
+        self.tables.setdefault(table, []).extend(rows)
+
+    def frame(self, table: str) -> pd.DataFrame:
+        """Return a table as a DataFrame."""
+        return pd.DataFrame(self.tables.get(table, []))
+
+
+def _reset_peak_rss() -> bool:
+    # Linux only: writing 5 resets the VmHWM high-water mark for this process
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _process_peak_rss_mb()
+
+
+def _process_peak_rss_mb() -> float:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+class StageTimer:
+    """Collects per-batch latencies and item counts for one stage."""
+
+    def __init__(self, name: str, unit: str):
+        """Start a stage and reset the peak RSS mark where supported."""
+        self.name = name
+        self.unit = unit
+        self.latencies: List[float] = []
+        self.items = 0
+        self.rss_is_stage_local = _reset_peak_rss()
+
+    def measure(self, func: Callable[[], Any], items: Callable[[Any], int]) -> Any:
+        """Run one batch, recording its latency and the items it handled."""
+        started = time.perf_counter()
+        result = func()
+        self.latencies.append(time.perf_counter() - started)
+        self.items += items(result)
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        """Return the stage metrics."""
+        latencies_ms = np.asarray(self.latencies) * 1000
+        seconds = float(sum(self.latencies))
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if self.latencies else (0, 0, 0)
+        return {
+            "unit": self.unit,
+            "items": self.items,
+            "batches": len(self.latencies),
+            "seconds": round(seconds, 3),
+            "throughput_per_s": round(self.items / seconds, 1) if seconds else None,
+            "latency_ms": {
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(latencies_ms.max()), 3) if self.latencies else 0.0,
+            },
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "peak_rss_scope": "stage" if self.rss_is_stage_local else "process",
+        }
+
+
+def tracked_priorities() -> Dict[str, str]:
+    """Return tracked token address -> priority from tokens.yml."""
+    with open(TOKENS_CONFIG) as f:
+        tokens = yaml.safe_load(f)["tokens"]["tracked_tokens"]
+    return {t["address"].lower(): t["priority"] for t in tokens}
+
+
+def build_chain(config: BenchmarkConfig) -> SyntheticChain:
+    """Build the deterministic synthetic chain for a profile."""
+    return SyntheticChain(
+        token_population(tracked_priorities(), n_tokens=config.n_tokens, seed=config.seed),
+        n_blocks=config.n_blocks,
+        seed=config.seed,
+        mean_logs_per_block=config.mean_logs_per_block,
+        n_addresses=config.n_addresses,
+        n_pools=config.n_pools,
+        block_time_seconds=config.block_time_seconds,
+    )
+
+
+def block_message(header: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an RPC block header to the ``eth.blocks.raw`` message shape."""
+    return {
+        "number": int(header["number"], 16),
+        "hash": header["hash"],
+        "parent_hash": header["parentHash"],
+        "timestamp": int(header["timestamp"], 16),
+        "transaction_count": len(header["transactions"]),
+    }
+
+
+def _windows(chain: SyntheticChain, size: int) -> Iterable[Tuple[int, int]]:
+    for start in range(chain.start_block, chain.last_block + 1, size):
+        yield start, min(start + size - 1, chain.last_block)
+
+
+def _publish_window(producer: Any, headers: List[Dict[str, Any]], logs: List[Dict[str, Any]]):
+    for header in headers:
+        message = block_message(header)
+        producer.send(BLOCKS_TOPIC, value=json.dumps(message).encode("utf-8"))
+    return len(headers) + publish_logs(producer, logs, LOGS_TOPIC)
+
+
+def _scan_stage(chain: SyntheticChain, config: BenchmarkConfig) -> Tuple[Dict[str, Any], list]:
+    # Every ERC-20 Transfer, so the downstream stages see all tokens. Headers
+    # are generated outside the timer; the fake endpoint's JSON encoding stays
+    # inside and stands in for response decoding.
+    rpc = FixtureRpc(chain, max_results=10**9)
+    scanner = LogScanner(rpc, None, max_block_range=config.max_block_range)
+    timer = StageTimer("scan", "logs")
+    windows = []
+    for start, end in _windows(chain, config.max_block_range):
+        headers = [chain.header(n) for n in range(start, end + 1)]
+        logs = timer.measure(partial(scanner.scan_range, start, end), len)
+        windows.append((headers, logs))
+    return dict(timer.report(), rpc_calls=rpc.stats.calls), windows
+
+
+def _produce_stage(windows: list) -> Tuple[Dict[str, Any], FakeBroker]:
+    broker = FakeBroker()
+    producer = broker.producer()
+    timer = StageTimer("produce", "messages")
+    for headers, logs in windows:
+        timer.measure(partial(_publish_window, producer, headers, logs), int)
+    return timer.report(), broker
+
+
+def _load_stage(broker: FakeBroker, config: BenchmarkConfig) -> Tuple[Dict[str, Any], MemoryTable]:
+    sink = MemoryTable()
+    loader = RawTopicLoader(
+        broker.consumer(BLOCKS_TOPIC, LOGS_TOPIC, group_id="benchmark"),
+        broker.producer(),
+        sink,
+        consumer_group="benchmark",
+        max_records=config.loader_batch_size,
+        poll_timeout_ms=0,
+    )
+    timer = StageTimer("load", "messages")
+    while timer.measure(loader.poll_once, lambda r: r.consumed if r else 0) is not None:
+        pass
+    timer.latencies.pop()  # the final empty poll
+    return timer.report(), sink
+
+
+def _aggregate_day(logs: pd.DataFrame, blocks: pd.DataFrame) -> Tuple[int, pd.DataFrame]:
+    transfers = decode_transfers(logs, blocks)
+    return len(transfers), compute_token_metrics_daily(transfers)
+
+
+def _aggregate_stage(sink: MemoryTable) -> Tuple[Dict[str, Any], pd.DataFrame, int]:
+    # One daily run per chain day over that day's raw rows, as the DAG would
+    # select them from ClickHouse (the selection itself is not timed)
+    blocks = sink.frame("raw_blocks")
+    logs = sink.frame("raw_logs")
+    block_days = pd.to_datetime(blocks["timestamp"], unit="s", utc=True).dt.date
+    log_days = logs["block_number"].map(pd.Series(block_days.to_numpy(), index=blocks["number"]))
+
+    timer = StageTimer("aggregate", "transfers")
+    daily = []
+    for day in sorted(block_days.unique()):
+        day_logs, day_blocks = logs[log_days == day], blocks[block_days == day]
+        daily.append(
+            timer.measure(partial(_aggregate_day, day_logs, day_blocks), lambda r: r[0])[1]
+        )
+    return timer.report(), pd.concat(daily, ignore_index=True), timer.items
+
+
+def _anomaly_stage(metrics: pd.DataFrame, config: BenchmarkConfig) -> Tuple[Dict[str, Any], int]:
+    # Score the last days in order: the first run trains the model, later runs
+    # reuse it and only refit drifted tokens
+    iforest = IForestConfig(workers=1)
+    run_dates: List[date] = sorted(metrics["date"].unique())[-config.score_days :]
+    timer = StageTimer("anomaly", "token_days")
+    anomalies = 0
+    with tempfile.TemporaryDirectory() as model_dir:
+        for run_date in run_dates:
+            history = metrics[metrics["date"] <= run_date]
+            token_days = int((history["date"] == run_date).sum())
+            flagged = timer.measure(
+                partial(detect_token_multivariate_anomalies, history, run_date, model_dir, iforest),
+                lambda _, n=token_days: n,
+            )
+            anomalies += len(flagged)
+    return timer.report(), anomalies
+
+
+def run_benchmark(config: BenchmarkConfig, profile: str = "custom") -> Dict[str, Any]:
+    """Run every stage on the synthetic chain and return the JSON report."""
+    chain = build_chain(config)
+    stages: Dict[str, Dict[str, Any]] = {}
+    started = time.perf_counter()
+
+    # Each stage's input is dropped once the next stage has consumed it
+    stages["scan"], windows = _scan_stage(chain, config)
+    n_logs = stages["scan"]["items"]
+    stages["produce"], broker = _produce_stage(windows)
+    del windows
+    stages["load"], sink = _load_stage(broker, config)
+    del broker
+    raw_rows = sum(len(rows) for rows in sink.tables.values())
+    stages["aggregate"], metrics, n_transfers = _aggregate_stage(sink)
+    del sink
+    stages["anomaly"], anomalies = _anomaly_stage(metrics, config)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "profile": profile,
+        "config": asdict(config),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+        },
+        "workload": {
+            "blocks": config.n_blocks,
+            "logs": n_logs,
+            "raw_rows": raw_rows,
+            "transfers": n_transfers,
+            "token_days": len(metrics),
+            "anomalies": anomalies,
+        },
+        "stages": stages,
+        "end_to_end": {
+            "seconds": round(elapsed, 3),
+            "blocks_per_s": round(config.n_blocks / elapsed, 1),
+            "peak_rss_mb": max(stage["peak_rss_mb"] for stage in stages.values()),
+        },
+    }
+
+
+def compare_reports(
+    report: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25
+) -> List[str]:
+    """Return regressions of ``report`` against ``baseline``.
+
+    A stage regresses when its throughput drops, or its p95 latency or peak
+    RSS grows, by more than ``threshold`` (a fraction). Timings are only
+    comparable for the same workload, so a workload mismatch is reported as
+    a failure on its own.
+
+    Args:
+        report: Report from :func:`run_benchmark`.
+        baseline: Stored report for the same profile.
+        threshold: Allowed relative change, e.g. 0.25 for 25%.
+
+    Returns:
+        Human-readable regression messages; empty if none.
+    """
+    expected = {k: baseline["workload"][k] for k in WORKLOAD_KEYS}
+    actual = {k: report["workload"][k] for k in WORKLOAD_KEYS}
+    if expected != actual:
+        return [f"workload changed: baseline {expected}, current {actual}"]
+
+    regressions = []
+    for stage, base in baseline["stages"].items():
+        current = report["stages"].get(stage)
+        if current is None:
+            regressions.append(f"{stage}: stage missing from report")
+            continue
+        checks = [
+            ("throughput_per_s", base["throughput_per_s"], current["throughput_per_s"], -1),
+            ("latency p95 ms", base["latency_ms"]["p95"], current["latency_ms"]["p95"], 1),
+        ]
+        if base.get("peak_rss_scope") == current.get("peak_rss_scope"):
+            checks.append(("peak_rss_mb", base["peak_rss_mb"], current["peak_rss_mb"], 1))
+        for metric, old, new, worse in checks:
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * worse > threshold:
+                regressions.append(f"{stage} {metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def baseline_path(profile: str) -> Path:
+    """Return the stored baseline path for a profile."""
+    return BASELINE_DIR / f"{profile}.json"
+
+
+def load_report(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Load a JSON report, or None if the file does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report: Dict[str, Any], path: Union[str, Path]) -> None:
+    """Write a JSON report."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
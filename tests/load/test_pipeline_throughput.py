@@ -0,0 +1,41 @@
+"""Load tests: end-to-end pipeline throughput against the stored baseline."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.load.pipeline_benchmark import STAGES
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.mark.slow
+def test_smoke_profile_has_no_regressions(tmp_path):
+    """The smoke profile stays within the regression threshold of its baseline."""
+    # Out of process, without coverage tracing, so timings match the baseline
+    env = {k: v for k, v in os.environ.items() if not k.startswith("COV_CORE")}
+    output = tmp_path / "report.json"
+    threshold = os.environ.get("BENCHMARK_THRESHOLD", "0.5")
+    completed = subprocess.run(
+        [
+            sys.executable,
+            str(PROJECT_ROOT / "scripts" / "benchmark_pipeline.py"),
+            "--profile",
+            "smoke",
+            "--threshold",
+            threshold,
+            "--output",
+            str(output),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    report = json.loads(output.read_text())
+    assert tuple(report["stages"]) == STAGES
@@ -0,0 +1,207 @@
+"""Unit tests for the multivariate Isolation Forest detector."""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipelines.jobs.anomalies.detect_token_multivariate_anomalies import (
+    detect_token_multivariate_anomalies,
+)
+from pipelines.libs.iforest_utils import (
+    IForestConfig,
+    ModelStore,
+    fit_profiles,
+    refresh_model,
+    train_model,
+)
+
+START = date(2024, 1, 1)
+
+
+def make_metrics(n_tokens: int = 40, n_days: int = 60, seed: int = 0) -> pd.DataFrame:
+    """Build token-day metrics with per-token scales."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for t in range(n_tokens):
+        volume = 10 ** rng.uniform(3, 8)
+        tx = 10 ** rng.uniform(1, 4)
+        for d in range(n_days):
+            rows.append(
+                {
+                    "token_address": f"0x{t:040x}",
+                    "date": START + timedelta(days=d),
+                    "volume": volume * rng.lognormal(0, 0.2),
+                    "tx_count": round(tx * rng.lognormal(0, 0.2)),
+                    "unique_addresses": round(tx * 0.4 * rng.lognormal(0, 0.2)),
+                    "price_change": rng.normal(0, 0.02),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def config() -> IForestConfig:
+    """Small, serial configuration for fast tests."""
+    return IForestConfig(n_estimators=50, workers=1)
+
+
+@pytest.mark.unit
+def test_parallel_profiles_match_serial(config):
+    """Batched process-pool profile fitting matches the in-process result."""
+    metrics = make_metrics(n_tokens=25)
+    serial = fit_profiles(metrics, config)
+    parallel = fit_profiles(metrics, IForestConfig(workers=2, batch_size=4))
+
+    assert list(parallel.tokens) == list(serial.tokens)
+    np.testing.assert_allclose(parallel.medians, serial.medians)
+    np.testing.assert_allclose(parallel.scales, serial.scales)
+
+
+@pytest.mark.unit
+def test_profiles_skip_short_history(config):
+    """Tokens with too little history get no profile and are not scored."""
+    metrics = make_metrics(n_tokens=3)
+    short = metrics[metrics["date"] < START + timedelta(days=5)].head(5)
+    short = short.assign(token_address="0xnew")
+    model = train_model(pd.concat([metrics, short]), config)
+
+    assert "0xnew" not in set(model.profiles.tokens)
+    scored = model.score(short)
+    assert scored["anomaly_score"].isna().all()
+    assert not scored["is_anomaly"].any()
+
+
+@pytest.mark.unit
+def test_score_flags_multivariate_outlier(config):
+    """A token-day far outside its own history is scored as anomalous."""
+    metrics = make_metrics()
+    model = train_model(metrics, config)
+
+    day = metrics[metrics["date"] == START].copy()
+    spike = day["token_address"] == "0x" + "0" * 40
+    day.loc[spike, "volume"] *= 200
+    day.loc[spike, "unique_addresses"] *= 30
+
+    scored = model.score(day)
+    assert len(scored) == len(day)
+    assert scored.loc[spike, "is_anomaly"].all()
+    assert scored.loc[spike, "anomaly_score"].iloc[0] == scored["anomaly_score"].min()
+
+
+@pytest.mark.unit
+def test_model_store_roundtrip_and_pruning(tmp_path, config):
+    """Saved models reload identically and only the newest versions are kept."""
+    metrics = make_metrics(n_tokens=10)
+    model = train_model(metrics, config)
+    store = ModelStore(tmp_path, keep_versions=2)
+
+    for _ in range(3):
+        store.save(model)
+
+    assert store.versions() == [2, 3]
+    loaded = store.load()
+    assert loaded.version == 3
+    assert loaded.config == config
+    pd.testing.assert_frame_equal(loaded.score(metrics), model.score(metrics))
+
+
+@pytest.mark.unit
+def test_model_store_ignores_other_sklearn_version(tmp_path, config, monkeypatch):
+    """Artifacts pickled by another scikit-learn version are not loaded."""
+    store = ModelStore(tmp_path)
+    store.save(train_model(make_metrics(n_tokens=5), config))
+
+    monkeypatch.setattr("pipelines.libs.iforest_utils.sklearn.__version__", "0.0.0")
+    assert store.load() is None
+
+
+@pytest.mark.unit
+def test_refresh_model_reuses_and_refits_drifted_tokens(tmp_path, config):
+    """Stable data reuses the model; drifted tokens are refitted selectively."""
+    metrics = make_metrics()
+    recent = metrics[metrics["date"] >= START + timedelta(days=53)]
+    store = ModelStore(tmp_path)
+
+    _, status = refresh_model(store, metrics, recent, config)
+    assert status == "trained"
+    _, status = refresh_model(store, metrics, recent, config)
+    assert status == "reused"
+    assert store.latest_version() == 1
+
+    drifted = metrics.copy()
+    token = "0x" + "0" * 40
+    drifted.loc[
+        drifted.index.isin(recent.index) & (drifted["token_address"] == token), "volume"
+    ] *= 100
+    before = store.load()
+    model, status = refresh_model(store, drifted, drifted.loc[recent.index], config)
+
+    assert status == "profiles_refit"
+    assert store.latest_version() == 2
+    changed = model.profiles.medians != before.profiles.medians
+    assert set(model.profiles.tokens[changed.any(axis=1)]) == {token}
+    # The refitted profile follows the new regime, so the next run is not flagged again
+    _, status = refresh_model(store, drifted, drifted.loc[recent.index], config)
+    assert status == "reused"
+    assert store.latest_version() == 2
+
+    all_drifted = metrics.copy()
+    all_drifted.loc[recent.index, "volume"] *= 100
+    _, status = refresh_model(store, all_drifted, all_drifted.loc[recent.index], config)
+    assert status == "forest_refit"
+    _, status = refresh_model(store, all_drifted, all_drifted.loc[recent.index], config)
+    assert status == "reused"
+
+
+@pytest.mark.unit
+def test_refresh_model_reuses_while_new_token_is_too_young(tmp_path, config):
+    """A token short of min_history_days does not force a new version each run."""
+    metrics = make_metrics()
+    young = metrics[metrics["token_address"] == "0x" + "0" * 40].tail(5)
+    metrics = pd.concat([metrics, young.assign(token_address="0xnew")], ignore_index=True)
+    recent = metrics[metrics["date"] >= START + timedelta(days=53)]
+    store = ModelStore(tmp_path)
+
+    statuses = [refresh_model(store, metrics, recent, config)[1] for _ in range(3)]
+
+    assert statuses == ["trained", "reused", "reused"]
+    assert store.versions() == [1]
+
+
+@pytest.mark.unit
+def test_refresh_model_reuses_when_drifted_token_is_too_sparse(tmp_path, config):
+    """A drifted token without enough rows in the refit window keeps its profile."""
+    metrics = make_metrics()
+    store = ModelStore(tmp_path)
+    refresh_model(store, metrics, metrics.tail(0), config)
+
+    token = "0x" + "0" * 40
+    recent = metrics[
+        (metrics["token_address"] == token) & (metrics["date"] == metrics["date"].max())
+    ]
+    drifted = metrics.copy()
+    drifted.loc[recent.index, "volume"] *= 100
+    sparse = drifted.drop(drifted.index[(drifted["token_address"] == token)][-7:-1])
+
+    _, status = refresh_model(store, sparse, sparse.loc[recent.index], config)
+
+    assert status == "reused"
+    assert store.versions() == [1]
+
+
+@pytest.mark.unit
+def test_detect_job_returns_anomaly_rows(tmp_path, config):
+    """The job scores the run date and shapes flagged rows for the anomalies table."""
+    metrics = make_metrics()
+    run_date = START + timedelta(days=59)
+    token = "0x" + "0" * 40
+    spike = (metrics["date"] == run_date) & (metrics["token_address"] == token)
+    metrics.loc[spike, ["volume", "tx_count", "unique_addresses"]] *= 50
+
+    anomalies = detect_token_multivariate_anomalies(metrics, run_date, tmp_path, config)
+
+    assert token in set(anomalies["entity_id"])
+    assert (anomalies["entity_type"] == "token").all()
+    assert (anomalies["model_version"] == 1).all()
@@ -0,0 +1,206 @@
+"""Unit tests for the tracked-token log scanner."""
+
+import json
+
+import pytest
+from eth_hash.auto import keccak
+
+from ingestion.chains.eth_mainnet.log_scanner import (
+    TRANSFER_TOPIC,
+    BloomMatcher,
+    LogScanner,
+    build_log_filter,
+    compute_logs_bloom,
+    load_tracked_token_addresses,
+    normalize_log,
+    publish_logs,
+)
+from ingestion.common.rpc_client import RpcError
+from tests.fakes.eth_rpc import FixtureRpc, RecordedChain, record_chain
+from tests.fakes.kafka_broker import FakeBroker
+from tests.fakes.synthetic_chain import SyntheticChain, token_population
+
+TRACKED = {
+    "0x00000000000000000000000000000000000000a1": "high",
+    "0x00000000000000000000000000000000000000b2": "medium",
+    "0x00000000000000000000000000000000000000c3": "low",
+}
+
+
+@pytest.fixture
+def chain():
+    """Small deterministic chain with the tracked tokens at their priority ranks."""
+    return SyntheticChain(
+        token_population(TRACKED, n_tokens=500),
+        n_blocks=60,
+        mean_logs_per_block=40,
+        n_addresses=2000,
+        n_pools=50,
+    )
+
+
+def expected_logs(chain, addresses, blocks):
+    """Brute-force tracked Transfer logs for the given block numbers."""
+    return [
+        normalize_log(log)
+        for n in blocks
+        for log in chain.logs(n)
+        if log["address"] in addresses and log["topics"][0] == TRANSFER_TOPIC
+    ]
+
+
+@pytest.mark.unit
+def test_load_tracked_token_addresses_and_filter(tmp_path):
+    """Addresses are lower-cased, deduplicated and filtered by priority."""
+    config = tmp_path / "tokens.yml"
+    tokens = [
+        ("AAA", "0xAA00000000000000000000000000000000000001", "high"),
+        ("BBB", "0xbb00000000000000000000000000000000000002", "low"),
+        ("AAA2", "0xaa00000000000000000000000000000000000001", "high"),
+    ]
+    config.write_text(
+        "tokens:\n  tracked_tokens:\n"
+        + "".join(f"    - {{symbol: {s}, address: '{a}', priority: {p}}}\n" for s, a, p in tokens)
+    )
+
+    assert load_tracked_token_addresses(config) == [
+        "0xaa00000000000000000000000000000000000001",
+        "0xbb00000000000000000000000000000000000002",
+    ]
+    assert load_tracked_token_addresses(config, min_priority="medium") == [
+        "0xaa00000000000000000000000000000000000001"
+    ]
+    assert build_log_filter(["0xAB"]) == {"address": ["0xab"], "topics": [[TRANSFER_TOPIC]]}
+
+
+@pytest.mark.unit
+def test_bloom_matcher_has_no_false_negatives(chain):
+    """Every block holding a tracked Transfer passes the bloom test."""
+    for address in TRACKED:
+        matcher = BloomMatcher([address])
+        for n in range(chain.start_block, chain.last_block + 1):
+            if expected_logs(chain, {address}, [n]):
+                assert matcher.may_contain(chain.header(n)["logsBloom"])
+
+    empty = "0x" + "0" * 512
+    assert not BloomMatcher(list(TRACKED)).may_contain(empty)
+
+
+@pytest.mark.unit
+def test_logs_bloom_known_answer():
+    """compute_logs_bloom matches the Yellow Paper M3:2048 construction for a USDT Transfer.
+
+    Expected bits are literals, not taken from the function under test: each
+    item sets the bits given by the low 11 bits of the first three byte pairs
+    of its keccak-256 hash, counted from the least significant end of the
+    big-endian 256-byte bloom.
+    """
+    assert keccak(b"").hex() == ("c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470")
+    assert "0x" + keccak(b"Transfer(address,address,uint256)").hex() == TRANSFER_TOPIC
+
+    usdt = "0xdac17f958d2ee523a2206206994597c13d831ec7"
+    log = {"address": usdt, "topics": [TRANSFER_TOPIC]}
+    expected = bytearray(256)
+    for bit in (679, 788, 1672) + (481, 1060, 1443):  # USDT address + Transfer topic
+        expected[255 - bit // 8] |= 1 << (bit % 8)
+
+    assert compute_logs_bloom([log]) == "0x" + expected.hex()
+    assert BloomMatcher([usdt]).may_contain("0x" + expected.hex())
+    assert not BloomMatcher(["0x" + "00" * 19 + "01"]).may_contain("0x" + expected.hex())
+
+
+@pytest.mark.unit
+def test_scan_range_matches_brute_force(chain):
+    """Range scans return exactly the tracked Transfers, one call per window."""
+    rpc = FixtureRpc(chain)
+    scanner = LogScanner(rpc, list(TRACKED), max_block_range=25)
+
+    logs = scanner.scan_range(chain.start_block, chain.last_block)
+
+    blocks = range(chain.start_block, chain.last_block + 1)
+    assert logs == expected_logs(chain, set(TRACKED), blocks)
+    assert logs
+    assert rpc.stats.calls == scanner.stats.requests == 3
+    assert scanner.stats.blocks == 60
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("limit_error_code", [-32005, -32602])
+def test_scan_range_splits_oversized_ranges(chain, limit_error_code):
+    """Result-limit errors bisect the range until each request fits."""
+    rpc = FixtureRpc(chain, max_results=5, limit_error_code=limit_error_code)
+    scanner = LogScanner(rpc, list(TRACKED), max_block_range=60)
+
+    logs = scanner.scan_range(chain.start_block, chain.last_block)
+
+    blocks = range(chain.start_block, chain.last_block + 1)
+    assert logs == expected_logs(chain, set(TRACKED), blocks)
+    assert scanner.stats.requests > 1
+
+
+@pytest.mark.unit
+def test_scan_range_does_not_bisect_invalid_filter(chain):
+    """An invalid-params error without a limit message fails on the first request."""
+    rpc = FixtureRpc(chain)
+    scanner = LogScanner(rpc, ["0x" + "a1" * 19], max_block_range=60)
+
+    with pytest.raises(RpcError, match="want 40 for common.Address"):
+        scanner.scan_range(chain.start_block, chain.last_block)
+    assert rpc.stats.calls == 1
+
+
+@pytest.mark.unit
+def test_scan_blocks_skips_blocks_ruled_out_by_bloom(chain):
+    """Head mode requests only blocks whose bloom may hold a tracked Transfer."""
+    low = [a for a, p in TRACKED.items() if p == "low"]
+    headers = [chain.header(n) for n in range(chain.start_block, chain.last_block + 1)]
+
+    with_bloom = LogScanner(FixtureRpc(chain), low)
+    without_bloom = LogScanner(FixtureRpc(chain), low, use_bloom=False)
+    logs = with_bloom.scan_blocks(headers)
+
+    assert logs == without_bloom.scan_blocks(headers)
+    assert logs == expected_logs(chain, set(low), range(chain.start_block, chain.last_block + 1))
+    assert with_bloom.stats.blocks_skipped > 0
+    assert with_bloom.rpc.stats.calls == 60 - with_bloom.stats.blocks_skipped
+    assert without_bloom.rpc.stats.calls == 60
+
+
+@pytest.mark.unit
+def test_recorded_fixture_round_trip(chain, tmp_path):
+    """A recorded fixture serves the same logs as the chain it was recorded from."""
+    path = tmp_path / "chain.jsonl.gz"
+    record_chain(FixtureRpc(chain), chain.start_block, chain.start_block + 9, path)
+    recorded = RecordedChain.load(path)
+
+    scanner = LogScanner(FixtureRpc(recorded), list(TRACKED))
+    blocks = range(chain.start_block, chain.start_block + 10)
+    assert scanner.scan_range(blocks[0], blocks[-1]) == expected_logs(chain, set(TRACKED), blocks)
+    assert recorded.header(blocks[3]) == chain.header(blocks[3])
+
+
+@pytest.mark.unit
+def test_publish_logs_keys_by_transaction_hash(chain):
+    """Scanned logs are published to eth.logs.raw keyed by transaction hash."""
+    broker = FakeBroker()
+    logs = LogScanner(FixtureRpc(chain), list(TRACKED)).scan_range(
+        chain.start_block, chain.start_block + 9
+    )
+
+    assert publish_logs(broker.producer(), logs) == len(logs)
+    records = broker.topics["eth.logs.raw"]
+    assert [json.loads(r.value) for r in records] == logs
+    assert [r.key.decode() for r in records] == [log["transaction_hash"] for log in logs]
+
+
+@pytest.mark.unit
+def test_publish_logs_raises_on_failed_send(chain):
+    """A send the broker never acknowledged is an error, not a sent message."""
+    broker = FakeBroker()
+    logs = LogScanner(FixtureRpc(chain), list(TRACKED)).scan_range(
+        chain.start_block, chain.start_block + 9
+    )
+
+    with pytest.raises(ConnectionError):
+        publish_logs(broker.producer(fail_topics={"eth.logs.raw"}), logs)
+    assert "eth.logs.raw" not in broker.topics
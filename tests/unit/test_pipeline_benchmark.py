@@ -0,0 +1,29 @@
+"""Unit tests for the pipeline benchmark report comparison."""
+
+import copy
+
+import pytest
+
+from tests.load.pipeline_benchmark import baseline_path, compare_reports, load_report
+
+
+@pytest.mark.unit
+def test_compare_reports_flags_regressions():
+    """Slower throughput, higher latency or RSS beyond the threshold are reported."""
+    baseline = load_report(baseline_path("smoke"))
+    assert compare_reports(baseline, baseline) == []
+
+    slower = copy.deepcopy(baseline)
+    slower["stages"]["load"]["throughput_per_s"] *= 0.5
+    slower["stages"]["anomaly"]["latency_ms"]["p95"] *= 1.1
+    assert [r.split(":")[0] for r in compare_reports(slower, baseline, 0.25)] == [
+        "load throughput_per_s"
+    ]
+
+    fatter = copy.deepcopy(baseline)
+    fatter["stages"]["scan"]["peak_rss_mb"] *= 2
+    assert compare_reports(fatter, baseline, 0.25)[0].startswith("scan peak_rss_mb")
+
+    changed = copy.deepcopy(baseline)
+    changed["workload"]["transfers"] += 1
+    assert compare_reports(changed, baseline)[0].startswith("workload changed")
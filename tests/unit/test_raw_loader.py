@@ -0,0 +1,354 @@
+"""Unit tests for raw topic validation, dead-lettering and DLQ replay."""
+
+import base64
+import json
+
+import pytest
+
+from ingestion.common.dlq import HEADER_ATTEMPT, dlq_topic, replay_dead_letters
+from ingestion.common.message_validation import (
+    BLOCK_SCHEMA,
+    DECODE_ERROR,
+    INVALID_FIELD,
+    MISSING_FIELD,
+    NOT_AN_OBJECT,
+    FieldRule,
+    MessageSchema,
+    validate_batch,
+)
+from ingestion.common.raw_loader import RawTopicLoader
+from tests.fakes.kafka_broker import FakeBroker
+
+BLOCKS = "eth.blocks.raw"
+LOGS = "eth.logs.raw"
+
+
+class RecordingSink:
+    """Sink that records every bulk insert."""
+
+    def __init__(self, fail: bool = False, fail_tables=()):
+        self.inserts = []
+        self.tokens = []
+        self.fail = fail
+        self.fail_tables = set(fail_tables)
+
+    def insert(self, table, columns, rows, dedup_token=None):
+        if self.fail or table in self.fail_tables:
+            raise ConnectionError("ClickHouse unavailable")
+        self.inserts.append((table, columns, rows))
+        self.tokens.append(dedup_token)
+
+
+def block(number: int, **overrides) -> bytes:
+    """Encode a valid block message."""
+    message = {
+        "number": number,
+        "hash": "0x" + f"{number:064x}",
+        "parent_hash": "0x" + f"{number - 1:064x}",
+        "timestamp": 1_700_000_000 + 12 * number,
+        "miner": "0x" + "ab" * 20,
+        "gas_used": 15_000_000,
+    }
+    message.update(overrides)
+    return json.dumps(message).encode()
+
+
+def log(index: int, **overrides) -> bytes:
+    """Encode a valid ERC-20 Transfer log message."""
+    message = {
+        "block_number": 100,
+        "transaction_hash": "0x" + "11" * 32,
+        "log_index": index,
+        "address": "0xdac17f958d2ee523a2206206994597c13d831ec7",
+        "topics": ["0x" + "dd" * 32, "0x" + "00" * 32, "0x" + "00" * 32],
+        "data": "0x" + "00" * 32,
+    }
+    message.update(overrides)
+    return json.dumps(message).encode()
+
+
+@pytest.fixture
+def broker() -> FakeBroker:
+    """Empty in-process broker."""
+    return FakeBroker()
+
+
+def make_loader(broker, sink, group_id="oracul-loaders", fail_topics=()):
+    return RawTopicLoader(
+        broker.consumer(BLOCKS, LOGS, group_id=group_id),
+        broker.producer(fail_topics),
+        sink,
+        consumer_group=group_id,
+    )
+
+
+@pytest.mark.unit
+def test_validate_batch_reports_each_error_type():
+    """Every kind of bad message is rejected with its own error type."""
+    values = [
+        block(1),
+        b"{not json",
+        b"[1, 2]",
+        block(2, hash="0x1234"),
+        json.dumps({"number": 3}).encode(),
+        None,
+        block(4, gas_used=None),
+    ]
+    result = validate_batch(values, BLOCK_SCHEMA)
+
+    assert result.valid_positions == [0, 6]
+    assert result.rows[1]["gas_used"] is None
+    assert [(e.position, e.error_type) for e in result.errors] == [
+        (1, DECODE_ERROR),
+        (2, NOT_AN_OBJECT),
+        (3, INVALID_FIELD),
+        (4, MISSING_FIELD),
+        (5, DECODE_ERROR),
+    ]
+    assert result.errors[2].field == "hash"
+
+
+@pytest.mark.unit
+def test_clean_batch_is_one_insert_without_dlq(broker):
+    """A valid batch is written with one bulk insert and nothing is dead-lettered."""
+    for n in range(1, 6):
+        broker.append(BLOCKS, block(n))
+    sink = RecordingSink()
+    loader = make_loader(broker, sink)
+
+    result = loader.poll_once()
+
+    assert result.inserted == {"raw_blocks": 5}
+    assert result.dead_lettered == {}
+    assert len(sink.inserts) == 1
+    assert [row["number"] for row in sink.inserts[0][2]] == [1, 2, 3, 4, 5]
+    assert dlq_topic(BLOCKS) not in broker.topics
+    assert broker.committed[("oracul-loaders", BLOCKS)] == 5
+
+
+@pytest.mark.unit
+def test_poison_messages_go_to_dlq_and_rest_of_batch_loads(broker):
+    """Bad records are isolated per topic; good ones still load in one write per table."""
+    broker.append(BLOCKS, block(1))
+    broker.append(BLOCKS, b"\x00\xff garbage", key=b"k1")
+    broker.append(BLOCKS, block(2))
+    broker.append(LOGS, log(0))
+    broker.append(LOGS, log(1, address="not-an-address"))
+    sink = RecordingSink()
+    loader = make_loader(broker, sink)
+
+    result = loader.poll_once()
+
+    assert result.consumed == 5
+    assert result.inserted == {"raw_blocks": 2, "raw_logs": 1}
+    assert result.dead_lettered == {BLOCKS: 1, LOGS: 1}
+    assert [table for table, _, _ in sink.inserts] == ["raw_blocks", "raw_logs"]
+
+    [dead_block] = broker.topics[dlq_topic(BLOCKS)]
+    envelope = json.loads(dead_block.value)
+    assert envelope["source_topic"] == BLOCKS
+    assert envelope["offset"] == 1
+    assert envelope["error_type"] == DECODE_ERROR
+    assert envelope["consumer_group"] == "oracul-loaders"
+    assert envelope["attempt"] == 1
+    assert base64.b64decode(envelope["payload"]) == b"\x00\xff garbage"
+    assert dead_block.key == b"k1"
+    assert dict(dead_block.headers)["dlq.error_type"] == DECODE_ERROR.encode()
+
+    envelope = json.loads(broker.topics[dlq_topic(LOGS)][0].value)
+    assert (envelope["error_type"], envelope["field"]) == (INVALID_FIELD, "address")
+    assert broker.committed[("oracul-loaders", BLOCKS)] == 3
+
+
+@pytest.mark.unit
+def test_failed_insert_does_not_commit(broker):
+    """If the bulk insert fails the offsets stay put so the batch is retried."""
+    broker.append(BLOCKS, block(1))
+    loader = make_loader(broker, RecordingSink(fail=True))
+
+    with pytest.raises(ConnectionError):
+        loader.poll_once()
+
+    assert ("oracul-loaders", BLOCKS) not in broker.committed
+    sink = RecordingSink()
+    make_loader(broker, sink).poll_once()
+    assert len(sink.inserts) == 1
+
+
+@pytest.mark.unit
+def test_undelivered_dead_letter_does_not_commit(broker):
+    """A dead letter the broker never acknowledged keeps the batch uncommitted."""
+    broker.append(BLOCKS, block(1))
+    broker.append(BLOCKS, b"garbage")
+    sink = RecordingSink()
+
+    with pytest.raises(ConnectionError):
+        make_loader(broker, sink, fail_topics={dlq_topic(BLOCKS)}).poll_once()
+
+    assert ("oracul-loaders", BLOCKS) not in broker.committed
+    assert dlq_topic(BLOCKS) not in broker.topics
+    assert sink.inserts == []
+    make_loader(broker, sink).poll_once()
+    assert len(broker.topics[dlq_topic(BLOCKS)]) == 1
+
+
+@pytest.mark.unit
+def test_redelivered_batch_reuses_insert_tokens(broker):
+    """A batch retried after a partial failure repeats the dedup token of the insert that landed."""
+    broker.append(BLOCKS, block(1))
+    broker.append(BLOCKS, block(2))
+    broker.append(LOGS, log(1))
+    failing = RecordingSink(fail_tables={"raw_logs"})
+    with pytest.raises(ConnectionError):
+        make_loader(broker, failing).poll_once()
+
+    sink = RecordingSink()
+    make_loader(broker, sink).poll_once()
+
+    assert [table for table, _, _ in sink.inserts] == ["raw_blocks", "raw_logs"]
+    assert sink.tokens[0] == failing.tokens[0] == f"{BLOCKS}/0:0-1"
+    assert sink.tokens[1] == f"{LOGS}/0:0-0"
+
+
+@pytest.mark.unit
+def test_unknown_topic_is_a_configuration_error(broker):
+    """Records from topics without a schema fail loudly instead of being dead-lettered."""
+    broker.append("eth.transactions.raw", b"{}")
+    loader = RawTopicLoader(
+        broker.consumer("eth.transactions.raw"), broker.producer(), RecordingSink()
+    )
+
+    with pytest.raises(ValueError, match="No message schema"):
+        loader.poll_once()
+
+
+@pytest.mark.unit
+def test_replay_refeeds_source_topic_after_fix(broker):
+    """After the cause is fixed, replayed payloads load through the normal path."""
+    broker.append(BLOCKS, block(1))
+    broker.append(BLOCKS, block(2, miner="0x" + "AB" * 19 + "Z0"))
+    broker.append(LOGS, b"oops")
+    make_loader(broker, RecordingSink()).poll_once()
+
+    stats = replay_dead_letters(
+        broker.consumer(dlq_topic(BLOCKS), dlq_topic(LOGS), group_id="replay"),
+        broker.producer(),
+        error_type=INVALID_FIELD,
+    )
+    assert (stats.replayed, stats.skipped, stats.unreadable) == (1, 1, 0)
+    replayed = broker.topics[BLOCKS][-1]
+    assert replayed.value == block(2, miner="0x" + "AB" * 19 + "Z0")
+    assert dict(replayed.headers)[HEADER_ATTEMPT] == b"1"
+
+    # The fix: stop validating the optional miner field
+    fixed = MessageSchema(
+        BLOCK_SCHEMA.name,
+        BLOCK_SCHEMA.table,
+        tuple(
+            FieldRule(r.name, lambda v: True, False) if r.name == "miner" else r
+            for r in BLOCK_SCHEMA.fields
+        ),
+    )
+    sink = RecordingSink()
+    loader = RawTopicLoader(
+        broker.consumer(BLOCKS, group_id="oracul-loaders"),
+        broker.producer(),
+        sink,
+        schemas={BLOCKS: fixed},
+    )
+    loader.poll_once()
+    assert [row["number"] for row in sink.inserts[0][2]] == [2]
+
+
+@pytest.mark.unit
+def test_replay_does_not_commit_undelivered_payloads(broker):
+    """A replayed payload the broker never acknowledged is replayed again next run."""
+    broker.append(BLOCKS, b"garbage")
+    make_loader(broker, RecordingSink()).poll_once()
+
+    with pytest.raises(ConnectionError):
+        replay_dead_letters(
+            broker.consumer(dlq_topic(BLOCKS), group_id="replay"),
+            broker.producer(fail_topics={BLOCKS}),
+            poll_timeout_ms=0,
+        )
+    assert ("replay", dlq_topic(BLOCKS)) not in broker.committed
+
+    stats = replay_dead_letters(
+        broker.consumer(dlq_topic(BLOCKS), group_id="replay"), broker.producer(), poll_timeout_ms=0
+    )
+    assert stats.replayed == 1
+    assert broker.values(BLOCKS)[-1] == b"garbage"
+
+
+@pytest.mark.unit
+def test_replay_of_still_broken_record_is_bounded(broker):
+    """A record that keeps failing comes back with a higher attempt and can be capped."""
+    broker.append(BLOCKS, block(1, timestamp="soon"))
+    make_loader(broker, RecordingSink()).poll_once()
+
+    replay_dead_letters(broker.consumer(dlq_topic(BLOCKS), group_id="replay"), broker.producer())
+    make_loader(broker, RecordingSink()).poll_once()
+    assert json.loads(broker.topics[dlq_topic(BLOCKS)][-1].value)["attempt"] == 2
+
+    stats = replay_dead_letters(
+        broker.consumer(dlq_topic(BLOCKS), group_id="replay"), broker.producer(), max_attempts=2
+    )
+    assert (stats.replayed, stats.skipped) == (0, 1)
+
+
+@pytest.mark.unit
+def test_replay_respects_max_messages_and_dry_run(broker):
+    """Replay stops at max_messages without skipping unreplayed records."""
+    for _ in range(3):
+        broker.append(
+            dlq_topic(BLOCKS), json.dumps({"source_topic": BLOCKS, "payload": None}).encode()
+        )
+
+    dry = replay_dead_letters(
+        broker.consumer(dlq_topic(BLOCKS), group_id="r"), broker.producer(), dry_run=True
+    )
+    assert dry.replayed == 3
+    assert BLOCKS not in broker.topics
+
+    first = replay_dead_letters(
+        broker.consumer(dlq_topic(BLOCKS), group_id="r"), broker.producer(), max_messages=2
+    )
+    second = replay_dead_letters(
+        broker.consumer(dlq_topic(BLOCKS), group_id="r"), broker.producer()
+    )
+    assert (first.replayed, second.replayed) == (2, 1)
+    assert len(broker.topics[BLOCKS]) == 3
+
+
+@pytest.mark.unit
+def test_replay_waits_for_group_join(broker):
+    """Empty polls while the consumer group is still joining do not end the replay."""
+    for _ in range(2):
+        broker.append(
+            dlq_topic(BLOCKS), json.dumps({"source_topic": BLOCKS, "payload": None}).encode()
+        )
+
+    consumer = broker.consumer(dlq_topic(BLOCKS), group_id="r", join_polls=3)
+    stats = replay_dead_letters(consumer, broker.producer(), poll_timeout_ms=0)
+
+    assert stats.replayed == 2
+    assert consumer.polls == 5
+
+
+@pytest.mark.unit
+def test_replay_gives_up_without_assignment(broker):
+    """A consumer that never gets partitions stops after the idle timeout."""
+    now = [0.0]
+
+    def clock():
+        now[0] += 1.0
+        return now[0]
+
+    consumer = broker.consumer(dlq_topic(BLOCKS), group_id="r", join_polls=100)
+    stats = replay_dead_letters(
+        consumer, broker.producer(), poll_timeout_ms=0, idle_timeout_ms=5000, clock=clock
+    )
+
+    assert stats.replayed == 0
+    assert consumer.polls == 5
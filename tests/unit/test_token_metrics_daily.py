@@ -0,0 +1,157 @@
+"""Unit tests for the daily token metrics aggregation job."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from pipelines.jobs.aggregates.compute_token_metrics_daily import (
+    TRANSFER_TOPIC,
+    canonical_blocks,
+    compute_token_metrics_daily,
+    decode_transfers,
+)
+
+TOKEN_A = "0x00000000000000000000000000000000000000aa"
+TOKEN_B = "0x00000000000000000000000000000000000000bb"
+DAY_1 = 1_700_006_400  # 2023-11-15 00:00 UTC
+DAY_2 = DAY_1 + 86_400
+
+
+def topic(address: str) -> str:
+    """Pad an address to a 32-byte topic."""
+    return "0x" + "0" * 24 + address[2:]
+
+
+def holder(i: int) -> str:
+    """Return a deterministic holder address."""
+    return f"0x{i:040x}"
+
+
+def transfer(
+    block: int, token: str, tx: int, sender: int, receiver: int, amount: int, log_index: int = 0
+) -> dict:
+    """Build a raw_logs row for an ERC-20 Transfer."""
+    return {
+        "block_number": block,
+        "transaction_hash": f"0x{tx:064x}",
+        "log_index": log_index,
+        "address": token,
+        "topics": [TRANSFER_TOPIC, topic(holder(sender)), topic(holder(receiver))],
+        "data": f"0x{amount:064x}",
+    }
+
+
+@pytest.fixture
+def raw():
+    """Two days of raw logs and blocks, with an ERC-721 and a non-Transfer log."""
+    logs = [
+        transfer(1, TOKEN_A, tx=1, sender=1, receiver=2, amount=10**18),
+        transfer(1, TOKEN_A, tx=1, sender=2, receiver=3, amount=5 * 10**17, log_index=1),
+        transfer(2, TOKEN_A, tx=2, sender=1, receiver=4, amount=2 * 10**18),
+        transfer(2, TOKEN_B, tx=3, sender=5, receiver=6, amount=7),
+        transfer(3, TOKEN_A, tx=4, sender=1, receiver=2, amount=3 * 10**18),
+        dict(
+            transfer(3, TOKEN_B, tx=5, sender=1, receiver=2, amount=0), topics=[TRANSFER_TOPIC] * 4
+        ),
+        dict(transfer(3, TOKEN_B, tx=6, sender=1, receiver=2, amount=1), topics=["0x" + "ab" * 32]),
+    ]
+    blocks = pd.DataFrame({"number": [1, 2, 3], "timestamp": [DAY_1, DAY_1 + 12, DAY_2]})
+    return pd.DataFrame(logs), blocks
+
+
+@pytest.mark.unit
+def test_decode_transfers_keeps_erc20_transfers_only(raw):
+    """Transfers decode to from/to/amount; ERC-721 and other events are dropped."""
+    logs, blocks = raw
+    transfers = decode_transfers(logs, blocks)
+
+    assert len(transfers) == 5
+    first = transfers.iloc[0]
+    assert (first["from_address"], first["to_address"]) == (holder(1), holder(2))
+    assert first["amount"] == 1e18
+    assert first["ts"] == pd.Timestamp(DAY_1, unit="s", tz="UTC")
+
+    undated = decode_transfers(logs, blocks[blocks["number"] < 3])
+    assert len(undated) == 4
+
+
+@pytest.mark.unit
+def test_decode_transfers_ignores_redelivered_rows(raw):
+    """Repeated block and log rows from at-least-once loading are counted once."""
+    logs, blocks = raw
+    transfers = decode_transfers(pd.concat([logs, logs.iloc[:1]]), pd.concat([blocks, blocks]))
+
+    assert len(transfers) == 5
+    assert transfers["amount"].sum() == decode_transfers(logs, blocks)["amount"].sum()
+
+
+@pytest.mark.unit
+def test_decode_transfers_follows_canonical_chain_after_reorg():
+    """Logs from an orphaned block are dropped and the canonical block dates the rest."""
+
+    def block_hash(n: int, fork: str = "a") -> str:
+        return "0x" + fork * 2 + f"{n:062x}"
+
+    # Orphaned block 2b is loaded last, but block 3 names 2a as its parent
+    blocks = pd.DataFrame(
+        {
+            "number": [1, 2, 2, 3],
+            "hash": [block_hash(1), block_hash(2), block_hash(2, "b"), block_hash(3)],
+            "parent_hash": [block_hash(0), block_hash(1), block_hash(1), block_hash(2)],
+            "timestamp": [DAY_1, DAY_1 + 12, DAY_1 + 10, DAY_1 + 24],
+        }
+    )
+    logs = pd.DataFrame(
+        [
+            dict(
+                transfer(1, TOKEN_A, tx=1, sender=1, receiver=2, amount=5), block_hash=block_hash(1)
+            ),
+            # The same transaction was included in both 2a and 2b
+            dict(
+                transfer(2, TOKEN_A, tx=2, sender=1, receiver=3, amount=7),
+                block_hash=block_hash(2, "b"),
+            ),
+            dict(
+                transfer(2, TOKEN_A, tx=2, sender=1, receiver=3, amount=7), block_hash=block_hash(2)
+            ),
+            dict(
+                transfer(2, TOKEN_B, tx=3, sender=4, receiver=5, amount=9),
+                block_hash=block_hash(2, "b"),
+            ),
+        ]
+    )
+
+    transfers = decode_transfers(logs, blocks)
+
+    assert transfers["amount"].tolist() == [5.0, 7.0]
+    assert transfers["ts"].iloc[1] == pd.Timestamp(DAY_1 + 12, unit="s", tz="UTC")
+    assert canonical_blocks(blocks)["hash"].tolist() == [
+        block_hash(1),
+        block_hash(2),
+        block_hash(3),
+    ]
+
+
+@pytest.mark.unit
+def test_compute_token_metrics_daily(raw):
+    """Metrics are aggregated per token and UTC day, with price changes when given."""
+    metrics = compute_token_metrics_daily(decode_transfers(*raw)).set_index(
+        ["token_address", "date"]
+    )
+
+    day_1, day_2 = date(2023, 11, 15), date(2023, 11, 16)
+    assert list(metrics.index) == [(TOKEN_A, day_1), (TOKEN_A, day_2), (TOKEN_B, day_1)]
+    assert metrics.loc[(TOKEN_A, day_1), "volume"] == 3.5e18
+    assert metrics.loc[(TOKEN_A, day_1), "tx_count"] == 2
+    assert metrics.loc[(TOKEN_A, day_1), "unique_addresses"] == 4
+    assert (metrics["price_change"] == 0.0).all()
+    assert (metrics["chain"] == "eth_mainnet").all()
+
+    prices = pd.DataFrame(
+        {"token_address": [TOKEN_A, TOKEN_A], "date": [day_1, day_2], "price": [2.0, 3.0]}
+    )
+    priced = compute_token_metrics_daily(decode_transfers(*raw), prices).set_index(
+        ["token_address", "date"]
+    )
+    assert priced["price_change"].tolist() == [0.0, 0.5, 0.0]
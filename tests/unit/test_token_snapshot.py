@@ -0,0 +1,209 @@
+"""Unit tests for building and publishing the token leaderboard snapshot."""
+
+import json
+import math
+import struct
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.app.services.token_snapshot import TokenSnapshot
+from pipelines.jobs.aggregates.publish_token_snapshot import publish_daily_token_snapshot
+from pipelines.libs.token_snapshot import (
+    MAGIC,
+    METRIC_COLUMNS,
+    POINTER_FILE,
+    build_token_snapshot,
+    publish_token_snapshot,
+)
+
+AS_OF = date(2024, 3, 31)
+TOKENS = [
+    {"address": "0x00000000000000000000000000000000000000AA", "symbol": "AAA", "decimals": 6},
+    {"address": "0x00000000000000000000000000000000000000bb", "symbol": "BBB", "decimals": 18},
+    {"address": "0x00000000000000000000000000000000000000cc", "symbol": "CCC", "decimals": 0},
+    {"address": "0x00000000000000000000000000000000000000aa", "symbol": "DUP", "decimals": 0},
+]
+
+
+def metrics_frame() -> pd.DataFrame:
+    """Build 40 days of metrics for AAA and BBB; CCC has no activity."""
+    rows = []
+    for offset in range(40):
+        day = AS_OF - timedelta(days=offset)
+        rows.append(("0x00000000000000000000000000000000000000aa", day, 1e6 * (offset + 1), 10, 5))
+        rows.append(("0x00000000000000000000000000000000000000BB", day, 5e18, 20 + offset, 3))
+    frame = pd.DataFrame(
+        rows, columns=["token_address", "date", "volume", "tx_count", "unique_addresses"]
+    )
+    return frame.assign(price_change=0.01)
+
+
+def anomalies_frame() -> pd.DataFrame:
+    """Flag BBB twice on the snapshot date and AAA the day before."""
+    return pd.DataFrame(
+        {
+            "entity_id": [TOKENS[1]["address"], TOKENS[1]["address"], TOKENS[0]["address"]],
+            "ts": pd.to_datetime(["2024-03-31 01:00", "2024-03-31 02:00", "2024-03-30 01:00"]),
+            "score": [-0.2, -0.4, -0.9],
+        }
+    )
+
+
+def prices_frame() -> pd.DataFrame:
+    """Price AAA on the snapshot date and BBB only the day before; CCC has no price."""
+    return pd.DataFrame(
+        {
+            "token_address": [TOKENS[0]["address"], TOKENS[1]["address"], TOKENS[1]["address"]],
+            "date": [AS_OF, AS_OF - timedelta(days=1), AS_OF + timedelta(days=1)],
+            "price": [1.0, 2000.0, 9999.0],
+        }
+    )
+
+
+def parse(content: bytes):
+    """Decode a snapshot into its header and numpy arrays."""
+    magic, header_length, _ = struct.unpack_from("<8sII", content)
+    assert magic == MAGIC
+    header = json.loads(content[16 : 16 + header_length])
+    base = (16 + header_length + 7) & ~7
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        assert (base + spec["offset"]) % 8 == 0
+        dtype = "<f8" if spec["format"] == "d" else "<u4"
+        arrays[name] = np.frombuffer(
+            content, dtype=dtype, count=spec["length"], offset=base + spec["offset"]
+        )
+    return header, arrays
+
+
+@pytest.mark.unit
+def test_snapshot_holds_latest_metrics_and_sparklines():
+    """Latest metrics are scaled to token units and sparklines cover the window."""
+    header, arrays = parse(build_token_snapshot(metrics_frame(), anomalies_frame(), AS_OF, TOKENS))
+
+    assert header["as_of"] == "2024-03-31"
+    assert [t["symbol"] for t in header["tokens"]] == ["AAA", "BBB", "CCC"]
+    assert header["sparkline"] == {"metric": "volume", "start": "2024-03-02", "days": 30}
+
+    latest = arrays["metrics"].reshape(3, len(METRIC_COLUMNS))
+    assert latest[0].tolist()[:4] == [1.0, 10.0, 5.0, 0.01]
+    assert latest[1].tolist()[:4] == [5.0, 20.0, 3.0, 0.01]
+    assert latest[2].tolist()[:4] == [0.0, 0.0, 0.0, 0.0]
+    assert latest[1, 4] == -0.4
+    assert math.isnan(latest[0, 4]) and math.isnan(latest[2, 4])
+    assert np.isnan(latest[:, 5]).all()  # no prices, no USD volume
+
+    sparklines = arrays["sparklines"].reshape(3, 30)
+    assert sparklines[0].tolist() == [float(30 - i) for i in range(30)]
+    assert sparklines[2].tolist() == [0.0] * 30
+
+
+@pytest.mark.unit
+def test_snapshot_rankings():
+    """Rankings sort by the latest metric and leave out unscored tokens."""
+    header, arrays = parse(build_token_snapshot(metrics_frame(), anomalies_frame(), AS_OF, TOKENS))
+
+    assert header["rankings"] == ["volume", "tx_count", "unique_addresses", "anomaly_score"]
+    assert arrays["rank_volume"].size == 0
+    assert arrays["rank_tx_count"].tolist() == [1, 0, 2]
+    assert arrays["rank_unique_addresses"].tolist() == [0, 1, 2]
+    assert arrays["rank_anomaly_score"].tolist() == [1]
+
+
+@pytest.mark.unit
+def test_snapshot_ranks_volume_in_usd():
+    """Volume ranks by USD value at the last close on or before as_of; unpriced tokens are out."""
+    _, arrays = parse(
+        build_token_snapshot(
+            metrics_frame(), anomalies_frame(), AS_OF, TOKENS, prices=prices_frame()
+        )
+    )
+
+    latest = arrays["metrics"].reshape(3, len(METRIC_COLUMNS))
+    assert latest[0, 5] == 1.0
+    assert latest[1, 5] == 5.0 * 2000.0
+    assert math.isnan(latest[2, 5])
+    # AAA moves more tokens, but BBB moves more value
+    assert arrays["rank_volume"].tolist() == [1, 0]
+
+
+@pytest.mark.unit
+def test_snapshot_without_anomalies():
+    """An empty anomalies frame leaves every anomaly score unset."""
+    empty = pd.DataFrame(columns=["entity_id", "ts", "score"])
+    header, arrays = parse(build_token_snapshot(metrics_frame(), empty, AS_OF, TOKENS, 7))
+
+    assert header["sparkline"]["days"] == 7
+    assert np.isnan(arrays["metrics"].reshape(3, -1)[:, 4]).all()
+    assert arrays["rank_anomaly_score"].size == 0
+
+
+@pytest.mark.unit
+def test_api_reader_round_trip(tmp_path):
+    """The API's stdlib reader sees what the pipeline writer published."""
+    path = publish_token_snapshot(
+        metrics_frame(), anomalies_frame(), AS_OF, tmp_path, TOKENS, prices=prices_frame()
+    )
+    snapshot = TokenSnapshot(path)
+
+    assert snapshot.as_of == AS_OF
+    assert snapshot.find("bbb") == snapshot.find(TOKENS[1]["address"].upper()) == 1
+    assert snapshot.metric_names == list(METRIC_COLUMNS)
+    assert snapshot.metrics(1) == {
+        "volume": 5.0,
+        "tx_count": 20.0,
+        "unique_addresses": 3.0,
+        "price_change": 0.01,
+        "anomaly_score": -0.4,
+        "volume_usd": 10000.0,
+    }
+    assert snapshot.top("volume", 10) == [1, 0]
+    assert snapshot.ranks(0) == {
+        "volume": 2,
+        "tx_count": 2,
+        "unique_addresses": 1,
+        "anomaly_score": None,
+    }
+    assert snapshot.ranks(2)["volume"] is None
+    assert snapshot.sparkline_start == AS_OF - timedelta(days=29)
+    assert snapshot.sparkline(0) == [float(30 - i) for i in range(30)]
+
+
+@pytest.mark.unit
+def test_publish_replaces_pointer_and_prunes(tmp_path):
+    """Each publish points CURRENT at the new file and keeps the newest ``keep``."""
+    published = [
+        publish_token_snapshot(
+            metrics_frame(), anomalies_frame(), AS_OF - timedelta(days=i), tmp_path, TOKENS, keep=2
+        )
+        for i in range(3)
+    ]
+
+    assert (tmp_path / POINTER_FILE).read_text() == published[-1].name
+    assert sorted(tmp_path.glob("*.snap")) == published[1:]
+    assert not list(tmp_path.glob(".*"))
+
+
+@pytest.mark.unit
+def test_publish_daily_snapshot_uses_tracked_tokens(tmp_path):
+    """The DAG task publishes every token listed in tokens.yml."""
+    config = tmp_path / "tokens.yml"
+    config.write_text(
+        "tokens:\n  tracked_tokens:\n"
+        + "".join(
+            f'    - symbol: "{t["symbol"]}"\n      address: "{t["address"]}"\n'
+            f'      decimals: {t["decimals"]}\n'
+            for t in TOKENS[:2]
+        )
+    )
+
+    path = publish_daily_token_snapshot(
+        metrics_frame(), anomalies_frame(), AS_OF, tmp_path / "snapshots", config
+    )
+
+    header, _ = parse(path.read_bytes())
+    assert [t["symbol"] for t in header["tokens"]] == ["AAA", "BBB"]
+    assert (path.parent / POINTER_FILE).read_text() == path.name